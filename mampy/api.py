@@ -34,10 +34,14 @@ def multicomplist():
 
 
 def complist(*args, **kwargs):
+    if not args and not kwargs:
+        return ComponentList.from_active()
     return _get_dagpath_list_from_type(ComponentList, *args, **kwargs)
 
 
 def daglist(*args, **kwargs):
+    if not args and not kwargs:
+        return DagpathList.from_active()
     return _get_dagpath_list_from_type(DagpathList, *args, **kwargs)
 
 
@@ -0,0 +1,85 @@
+"""
+This module contains functions for reading mesh data from the Maya API into
+``numpy`` arrays.
+"""
+import ctypes
+
+import numpy as np
+
+import maya.OpenMaya as oapi
+import maya.api.OpenMaya as api
+
+
+__all__ = ['get_index_array', 'get_matrix_array', 'get_unit_array', 'get_points_array',
+           'get_normals_array', 'get_uvs_array']
+
+
+def get_index_array(indices):
+    """
+    Return given indices as a contiguous integer array.
+    """
+    return np.fromiter(indices, dtype=np.int64, count=len(indices))
+
+
+def get_matrix_array(matrix):
+    """
+    Return ``api.MMatrix`` as a ``(4, 4)`` array.
+    """
+    return np.array(list(matrix), dtype=np.float64).reshape(4, 4)
+
+
+def get_unit_array(vectors):
+    """
+    Return rows of vectors scaled to unit length, zero length rows are kept.
+    """
+    vectors = np.asarray(vectors, dtype=np.float64)
+    lengths = np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
+    return vectors / np.where(lengths > 0, lengths, 1.0)[:, np.newaxis]
+
+
+def get_old_api_mesh(dagpath):
+    """
+    Return an old api ``MFnMesh`` from a new api ``MDagPath``.
+
+    The old api is the only one exposing the raw point buffer of the mesh.
+    """
+    sel = oapi.MSelectionList()
+    sel.add(dagpath.fullPathName())
+    old_dagpath = oapi.MDagPath()
+    sel.getDagPath(0, old_dagpath)
+    return oapi.MFnMesh(old_dagpath)
+
+
+def get_points_array(dagpath, space=api.MSpace.kWorld):
+    """
+    Return all points of mesh as a ``(N, 3)`` float array.
+
+    The points are copied straight out of the float buffer held by the mesh
+    and moved to world space with a single matrix product.
+    """
+    mesh = get_old_api_mesh(dagpath)
+    count = mesh.numVertices()
+    buffer_ = (ctypes.c_float * (count * 3)).from_address(int(mesh.getRawPoints()))
+    points = np.ctypeslib.as_array(buffer_).reshape(count, 3).astype(np.float64)
+    if space == api.MSpace.kWorld:
+        matrix = get_matrix_array(dagpath.inclusiveMatrix())
+        points = points.dot(matrix[:3, :3]) + matrix[3, :3]
+    return np.ascontiguousarray(points)
+
+
+def get_normals_array(mesh, space=api.MSpace.kWorld):
+    """
+    Return all vertex normals of mesh as a ``(N, 3)`` float array.
+    """
+    normals = mesh.getVertexNormals(False, space)
+    return np.array(normals, dtype=np.float64).reshape(-1, 3)
+
+
+def get_uvs_array(mesh, uvset=None):
+    """
+    Return all uvs of mesh as a ``(N, 2)`` float array.
+    """
+    us, vs = mesh.getUVs(uvset) if uvset else mesh.getUVs()
+    return np.column_stack((np.array(us, dtype=np.float64),
+                            np.array(vs, dtype=np.float64)))
+
@@ -0,0 +1,530 @@
+"""
+This module contains the `MeshCache` and `MeshPool` classes, function sets,
+geometry and topology arrays of a mesh shared by every component on it.
+
+Caches are kept per shape node and versioned. Node callbacks bump the version
+and drop cached data when the mesh is edited, so repeated queries between
+edits are free and queries after an edit are never stale. All caches live in
+one process wide pool that evicts least recently used data when the memory
+budget is exceeded.
+"""
+import sys
+import logging
+import itertools
+import collections
+
+import numpy as np
+
+import maya.api.OpenMaya as api
+from maya.api.OpenMaya import MFn
+
+from mampy.core.arrays import (get_index_array, get_matrix_array, get_unit_array,
+                               get_points_array, get_normals_array, get_uvs_array)
+from mampy.core.topology import MeshTopology, VERT, EDGE, FACE, MAP
+from mampy.core.spatial import KDTree, DEFAULT_TOLERANCE, get_mirror_indices
+from mampy.core.metrics import get_mesh_edge_lengths, get_mesh_face_centroids
+
+
+logger = logging.getLogger(__name__)
+
+
+__all__ = ['MeshCache', 'MeshPool', 'pool', 'get_mesh_cache', 'get_topology',
+           'clear_caches', 'set_memory_budget', 'get_pool_stats']
+
+
+DEFAULT_BUDGET = 512 * 1024 ** 2
+
+# Versions are drawn from one process wide counter, so a cache created after
+# clear_caches or a pool replacement never repeats a version of the old one.
+_versions = itertools.count(1)
+
+
+def get_nbytes(value):
+    """
+    Return bytes held by a cached value.
+    """
+    try:
+        return value.nbytes
+    except AttributeError:
+        if isinstance(value, tuple):
+            return sum(get_nbytes(item) for item in value)
+        if isinstance(value, list):
+            return get_list_nbytes(value)
+        return 0
+
+
+def get_list_nbytes(value):
+    """
+    Return estimated bytes held by a list, from the size of its first item.
+    """
+    if not value:
+        return sys.getsizeof(value)
+    first = value[0]
+    item = get_list_nbytes(first) if isinstance(first, list) else sys.getsizeof(first)
+    return sys.getsizeof(value) + len(value) * item
+
+
+class MeshCache(object):
+    """
+    Versioned cache of a mesh shape node.
+
+    ``geometry_version`` is bumped whenever the node is dirtied or one of
+    its attributes change, ``topology_version`` when the rebuilt topology
+    differs from the cached one. Versions are unique within the process.
+    """
+
+    def __init__(self, dagpath, pool):
+        self.dagpath = api.MDagPath(dagpath)
+        self.mobject = self.dagpath.node()
+        self.handle = api.MObjectHandle(self.mobject)
+        self.key = self.handle.hashCode()
+        self.pool = pool
+
+        self.geometry_version = next(_versions)
+        self.topology_version = next(_versions)
+
+        self._data = {}
+        self._meshes = {}
+        self._topology = None
+        self._topology_dirty = True
+        self._signature = None
+
+        self._world_paths = set()
+        self._callbacks = [
+            api.MNodeMessage.addNodeDirtyPlugCallback(self.mobject, self._on_dirty),
+            api.MNodeMessage.addAttributeChangedCallback(self.mobject,
+                                                         self._on_attribute_changed),
+            api.MNodeMessage.addNodePreRemovalCallback(self.mobject, self._on_removal),
+        ]
+
+    def __repr__(self):
+        return '{}({}, version={})'.format(self.__class__.__name__,
+                                           self.dagpath.partialPathName(), self.version)
+
+    @property
+    def version(self):
+        return (self.topology_version, self.geometry_version)
+
+    @property
+    def mesh(self):
+        return self.get_mesh(self.dagpath)
+
+    @property
+    def nbytes(self):
+        return sum(get_nbytes(value) for value in self._data.itervalues())
+
+    @property
+    def topology(self):
+        """
+        Return `MeshTopology` of mesh, rebuilt only if it has been evicted or
+        the face vertex or face uv layout has changed since last build.
+        """
+        if self._topology_dirty or self._topology is None:
+            signature = self._get_signature()
+            if signature != self._signature or self._topology is None:
+                logger.debug('Building topology for {}'.format(self.dagpath.partialPathName()))
+                self._topology = MeshTopology.from_mesh(self.mesh)
+                self.pool.misses += 1
+                if signature != self._signature:
+                    self._signature = signature
+                    self.topology_version = next(_versions)
+            self._topology_dirty = False
+        else:
+            self.pool.hits += 1
+        # Topology grows as incidences are queried, keep the pool up to date.
+        self.pool.touch(self, 'topology', self._topology.nbytes)
+        return self._topology
+
+    def _get_signature(self):
+        counts, verts = self.mesh.getVertices()
+        uvs = self.mesh.getAssignedUVs()[1] if self.mesh.numUVSets else []
+        return (
+            self.mesh.numVertices, self.mesh.numEdges, self.mesh.numUVSets,
+            hash(get_index_array(counts).tobytes()),
+            hash(get_index_array(verts).tobytes()),
+            hash(get_index_array(uvs).tobytes()),
+        )
+
+    def get_mesh(self, dagpath):
+        """
+        Return shared ``api.MFnMesh`` of mesh instance at dagpath.
+        """
+        path = dagpath.fullPathName()
+        try:
+            return self._meshes[path]
+        except KeyError:
+            mesh = self._meshes[path] = api.MFnMesh(dagpath)
+            return mesh
+
+    def get(self, key, factory):
+        """
+        Return cached value at key, value is created with factory on a miss.
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            value = self._data[key] = factory()
+            self.pool.misses += 1
+        else:
+            self.pool.hits += 1
+        self.pool.touch(self, key, get_nbytes(value))
+        return value
+
+    def _get_space_key(self, name, dagpath, space):
+        if space != api.MSpace.kWorld:
+            return (name, space, None)
+
+        path = dagpath.fullPathName()
+        if path not in self._world_paths:
+            self._world_paths.add(path)
+            self._callbacks.append(api.MDagMessage.addWorldMatrixModifiedCallback(
+                dagpath, self._on_world_matrix_modified
+            ))
+        return (name, space, path)
+
+    def get_in_space(self, name, dagpath, space, factory):
+        """
+        Return cached value of name for mesh instance at dagpath in space,
+        created with factory on a miss. World space values are dropped when
+        the instance moves.
+        """
+        return self.get(self._get_space_key(name, dagpath, space), factory)
+
+    def get_points(self, dagpath, space=api.MSpace.kWorld):
+        """
+        Return all points of mesh instance at dagpath as a ``(N, 3)`` array.
+        """
+        key = self._get_space_key('points', dagpath, space)
+        return self.get(key, lambda: get_points_array(dagpath, space))
+
+    def get_normals(self, dagpath, space=api.MSpace.kWorld):
+        """
+        Return all vertex normals of mesh instance at dagpath as a ``(N, 3)``
+        array.
+        """
+        key = self._get_space_key('normals', dagpath, space)
+        return self.get(key, lambda: get_normals_array(self.get_mesh(dagpath), space))
+
+    def get_face_normals(self, dagpath, space=api.MSpace.kWorld):
+        """
+        Return all face normals of mesh instance at dagpath as a ``(N, 3)``
+        array.
+
+        Normals are computed from the object space points and moved to world
+        space with the inverse transpose of the world matrix.
+        """
+        def get_face_normals():
+            normals = self.topology.face_normals(self.get_points(dagpath, api.MSpace.kObject))
+            if space == api.MSpace.kWorld:
+                matrix = get_matrix_array(dagpath.inclusiveMatrixInverse())
+                normals = get_unit_array(normals.dot(matrix[:3, :3].T))
+            return normals
+
+        key = self._get_space_key('face_normals', dagpath, space)
+        return self.get(key, get_face_normals)
+
+    def get_edge_normals(self, dagpath, space=api.MSpace.kWorld, mode='vertex'):
+        """
+        Return all edge normals of mesh instance at dagpath as a ``(N, 3)``
+        array.
+
+        With mode ``vertex`` the normals of the edge vertices are averaged,
+        with mode ``face`` the normals of the faces using the edge.
+        """
+        def get_edge_normals():
+            if mode == 'vertex':
+                normals = self.get_normals(dagpath, space)
+                return get_unit_array(normals[self.topology.edge_verts].sum(axis=1))
+            elif mode == 'face':
+                incidence = self.topology.incidence(EDGE, FACE)
+                normals = self.get_face_normals(dagpath, space)[incidence.indices]
+                return get_unit_array(np.column_stack([
+                    np.bincount(incidence.rows, normals[:, axis], minlength=len(incidence))
+                    for axis in range(3)
+                ]))
+            raise ValueError('Unknown edge normal mode: {}'.format(mode))
+
+        key = self._get_space_key('edge_normals_' + mode, dagpath, space)
+        return self.get(key, get_edge_normals)
+
+    def get_edge_lengths(self, dagpath, space=api.MSpace.kWorld):
+        """
+        Return length of all edges of mesh instance at dagpath.
+        """
+        return self.get_in_space('edge_lengths', dagpath, space, lambda: get_mesh_edge_lengths(
+            self.topology, self.get_points(dagpath, space)))
+
+    def get_adjacency_lists(self):
+        """
+        Return `MeshTopology.vertex_adjacency` as ``(offsets, neighbours,
+        edges)`` lists, for graph searches stepping one vertex at a time.
+        """
+        return self.get('adjacency_lists', lambda: tuple(
+            array.tolist() for array in self.topology.vertex_adjacency()))
+
+    def get_adjacency_lengths(self, dagpath, space=api.MSpace.kWorld):
+        """
+        Return the length of the edge of each vertex adjacency entry as a
+        list, lining up with `get_adjacency_lists`.
+        """
+        def get_adjacency_lengths():
+            _, _, edges = self.topology.vertex_adjacency()
+            return self.get_edge_lengths(dagpath, space)[edges].tolist()
+        return self.get_in_space('adjacency_lengths', dagpath, space, get_adjacency_lengths)
+
+    def get_point_lists(self, dagpath, space=api.MSpace.kWorld):
+        """
+        Return all points of mesh instance at dagpath as a list of ``[x, y,
+        z]`` lists.
+        """
+        return self.get_in_space('point_lists', dagpath, space,
+                                 lambda: self.get_points(dagpath, space).tolist())
+
+    def get_uvs(self):
+        """
+        Return all uvs of mesh as a ``(N, 2)`` array.
+        """
+        return self.get('uvs', lambda: get_uvs_array(self.mesh))
+
+    def get_kdtree(self, dagpath, space=api.MSpace.kWorld):
+        """
+        Return `KDTree` over all points of mesh instance at dagpath.
+        """
+        return self.get_in_space('kdtree', dagpath, space,
+                                 lambda: KDTree(self.get_points(dagpath, space)))
+
+    def get_uv_kdtree(self):
+        """
+        Return `KDTree` over all uvs of mesh.
+        """
+        return self.get('uv_kdtree', lambda: KDTree(self.get_uvs()))
+
+    def get_mirror_map(self, kind, axis=0, tolerance=DEFAULT_TOLERANCE):
+        """
+        Return array holding the mirrored index of each ``kind`` element
+        across the object space plane normal to axis, ``-1`` where there is
+        no mirror within tolerance.
+
+        Vertices are matched by position, edges and uvs through their
+        mirrored vertices and faces by their mirrored centroids.
+        """
+        key = ('mirror', kind, axis, tolerance)
+        return self.get(key, lambda: self._get_mirror_map(kind, axis, tolerance))
+
+    def _get_mirror_map(self, kind, axis, tolerance):
+        topology = self.topology
+        points = self.get_points(self.dagpath, api.MSpace.kObject)
+        if kind == VERT:
+            return get_mirror_indices(points, axis, tolerance)
+        elif kind == FACE:
+            return get_mirror_indices(get_mesh_face_centroids(topology, points), axis, tolerance)
+
+        verts = self.get_mirror_map(VERT, axis, tolerance)
+        if kind == EDGE:
+            a, b = verts[topology.edge_verts[:, 0]], verts[topology.edge_verts[:, 1]]
+            return np.where((a >= 0) & (b >= 0), topology.find_edges(a, b), -1)
+        elif kind == MAP:
+            # Find the face vertex at the mirrored vertex of the mirrored face.
+            faces = self.get_mirror_map(FACE, axis, tolerance)
+            keys = topology.fv_face * topology.num_verts + topology.fv_vert
+            order = np.argsort(keys, kind='mergesort')
+            mirror_faces, mirror_verts = faces[topology.fv_face], verts[topology.fv_vert]
+            mirror_keys = mirror_faces * topology.num_verts + mirror_verts
+            pos = np.minimum(np.searchsorted(keys[order], mirror_keys), max(len(keys) - 1, 0))
+            found = ((topology.fv_uv >= 0) & (mirror_faces >= 0) & (mirror_verts >= 0) &
+                     (keys[order][pos] == mirror_keys))
+
+            uvs = np.full(topology.num_uvs, -1, dtype=np.int64)
+            uvs[topology.fv_uv[found]] = topology.fv_uv[order[pos[found]]]
+            return uvs
+        raise ValueError('Unknown component type: {}'.format(kind))
+
+    def evict(self, key):
+        """
+        Drop cached value at key without touching the version.
+        """
+        if key == 'topology':
+            self._topology = None
+        else:
+            self._data.pop(key, None)
+
+    def invalidate(self, topology=True):
+        self.geometry_version = next(_versions)
+        for key in self._data:
+            self.pool.discard(self, key)
+        self._data.clear()
+        if topology:
+            self._topology_dirty = True
+
+    def is_valid(self, mobject=None):
+        if not self._callbacks or not self.handle.isValid():
+            return False
+        return mobject is None or self.mobject == mobject
+
+    def remove(self):
+        """
+        Remove callbacks and drop all cached data.
+        """
+        if self._callbacks:
+            api.MMessage.removeCallbacks(self._callbacks)
+        self._callbacks = []
+        for key in self._data.keys() + ['topology']:
+            self.pool.discard(self, key)
+        self._data.clear()
+        self._meshes.clear()
+        self._topology = None
+
+    def _on_dirty(self, node, plug, *args):
+        self.invalidate()
+
+    def _on_attribute_changed(self, msg, plug, other_plug, *args):
+        # Locking, renaming and adding attributes leave the mesh as it is.
+        connection = msg & (api.MNodeMessage.kConnectionMade |
+                            api.MNodeMessage.kConnectionBroken)
+        if not (connection or msg & api.MNodeMessage.kAttributeSet):
+            return
+        self.invalidate(
+            topology=bool(connection) and plug.partialName(useLongNames=True) == 'inMesh'
+        )
+
+    def _on_world_matrix_modified(self, transform, modified, *args):
+        self.invalidate(topology=False)
+
+    def _on_removal(self, node, *args):
+        self.pool.remove(self)
+
+
+class MeshPool(object):
+    """
+    Process wide pool of `MeshCache` objects keyed by shape node.
+
+    Every cached value is tracked in least recently used order, when the
+    bytes held exceed ``budget`` the oldest values are evicted.
+    """
+
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._caches = {}
+        self._lru = collections.OrderedDict()
+        self._scene_callbacks = []
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, self.stats())
+
+    def __len__(self):
+        return len(self._caches)
+
+    def get(self, dagpath):
+        """
+        Return the `MeshCache` of the mesh at dagpath.
+        """
+        if dagpath.apiType() == MFn.kTransform:
+            dagpath = api.MDagPath(dagpath).extendToShape()
+
+        if not self._scene_callbacks:
+            self._scene_callbacks.extend([
+                api.MSceneMessage.addCallback(api.MSceneMessage.kBeforeNew, self.clear),
+                api.MSceneMessage.addCallback(api.MSceneMessage.kBeforeOpen, self.clear),
+            ])
+
+        mobject = dagpath.node()
+        key = api.MObjectHandle(mobject).hashCode()
+        cache = self._caches.get(key)
+        if cache is None or not cache.is_valid(mobject):
+            if cache is not None:
+                self.remove(cache)
+            cache = self._caches[key] = MeshCache(dagpath, self)
+        return cache
+
+    def touch(self, cache, key, nbytes):
+        """
+        Mark value at key as most recently used and evict old values if the
+        budget is exceeded.
+        """
+        lru_key = (cache.key, key)
+        self.nbytes += nbytes - self._lru.pop(lru_key, 0)
+        self._lru[lru_key] = nbytes
+        self._evict()
+
+    def discard(self, cache, key):
+        self.nbytes -= self._lru.pop((cache.key, key), 0)
+
+    def _evict(self):
+        while self.nbytes > self.budget and len(self._lru) > 1:
+            (cache_key, key), nbytes = self._lru.popitem(last=False)
+            self.nbytes -= nbytes
+            self.evictions += 1
+            self._caches[cache_key].evict(key)
+
+    def set_budget(self, nbytes):
+        self.budget = nbytes
+        self._evict()
+
+    def remove(self, cache):
+        if self._caches.get(cache.key) is cache:
+            del self._caches[cache.key]
+        cache.remove()
+
+    def clear(self, *args):
+        """
+        Remove all mesh caches.
+        """
+        for cache in self._caches.values():
+            cache.remove()
+        self._caches.clear()
+        self._lru.clear()
+        self.nbytes = 0
+
+    def stats(self):
+        return {
+            'meshes': len(self._caches),
+            'entries': len(self._lru),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'bytes': self.nbytes,
+            'budget': self.budget,
+        }
+
+
+pool = MeshPool()
+
+
+def clear_caches():
+    """
+    Remove all mesh caches.
+    """
+    pool.clear()
+
+
+def set_memory_budget(nbytes):
+    """
+    Set bytes the mesh pool may hold before evicting cached data.
+    """
+    pool.set_budget(nbytes)
+
+
+def get_pool_stats():
+    """
+    Return dictionary with hits, misses, evictions and bytes held by pool.
+    """
+    return pool.stats()
+
+
+def get_mesh_cache(dagpath):
+    """
+    Return the shared `MeshCache` of the mesh at dagpath.
+    """
+    return pool.get(dagpath)
+
+
+def get_topology(dagpath):
+    """
+    Return cached `MeshTopology` of mesh at dagpath.
+    """
+    return get_mesh_cache(dagpath).topology
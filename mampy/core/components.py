@@ -2,19 +2,32 @@
 This module contains the `Component` class and functions for working with
 ``Component`` objects.
 """
+import math
+import numbers
 import logging
 import itertools
-import collections
 from abc import ABCMeta
 
+import numpy as np
+
 # Maya API import
 import maya.cmds as cmds
 import maya.api.OpenMaya as api
 from maya.api.OpenMaya import MFn
 
-from mampy.core.utils import IndicesDict, ObjectDict, get_average_vert_normal
+from mampy.core.utils import IndicesDict, IndexSet, ObjectDict
+from mampy.core.arrays import get_index_array, get_matrix_array
+from mampy.core.strings import (parse_component_strings, format_component_string,
+                                get_component_strings, iter_component_strings)
+from mampy.core.cache import get_mesh_cache
+from mampy.core.spatial import KDTree, DEFAULT_TOLERANCE
+from mampy.core.graph import (get_component_labels, get_label_groups, get_edge_chains,
+                              split_outer_and_inner_verts, get_hop_distances,
+                              get_geodesic_distances, get_shortest_paths)
 from mampy.core.datatypes import BoundingBox
 from mampy.core.dagnodes import Node
+from mampy.core.exceptions import InvalidComponentSelection
+from mampy.core.undo import run_undoable
 
 
 logger = logging.getLogger(__name__)
@@ -24,9 +37,33 @@ __all__ = ['SingleIndexComponent', 'MeshVert', 'MeshEdge', 'MeshPolygon', 'MeshM
 
 
 def get_component_from_string(input_string):
+    components, _ = get_components_from_strings([input_string])
+    if components:
+        return components[0].dagpath, components[0].mobject
     return api.MSelectionList().add(input_string).getComponent(0)
 
 
+def get_components_from_strings(strings):
+    """
+    Return ``(components, rest)`` from component strings, a component per
+    mesh and component type and the strings that could not be parsed.
+
+    Strings are parsed in bulk, each mesh is looked up once from the first
+    string on it and not per string.
+    """
+    mtypes = {name: mtype for mtype, name in AbstractComponent._mtype_str.iteritems()}
+    parsed, rest = parse_component_strings(strings)
+
+    components, dagpaths = [], {}
+    for (node, comptype), indices in parsed.iteritems():
+        if node not in dagpaths:
+            string = format_component_string(node, comptype, indices[0], indices[0])
+            dagpaths[node] = api.MSelectionList().add(string).getComponent(0)[0]
+        component = SingleIndexComponent.create(dagpaths[node], mtypes[comptype])
+        components.append(component.add(indices))
+    return components, rest
+
+
 class AbstractComponent(object):
     __metaclass__ = ABCMeta
 
@@ -56,18 +93,30 @@ class AbstractComponent(object):
         self.dagpath = dagpath
         self.mobject = mobject
 
-        self._mesh = None
+        self._cache = None
+        self._version = None
 
     @property
     def mesh(self):
-        if self._mesh is None:
-            self._mesh = api.MFnMesh(self.dagpath)
-        return self._mesh
+        return self.cache.get_mesh(self.dagpath)
 
     @property
     def node(self):
         return (self.dagpath, self.mobject)
 
+    @property
+    def cache(self):
+        """
+        Shared `MeshCache` of the mesh the component lives on.
+        """
+        if self._cache is None or not self._cache.is_valid():
+            self._cache = get_mesh_cache(self.dagpath)
+        return self._cache
+
+    @property
+    def topology(self):
+        return self.cache.topology
+
     @classmethod
     def create(cls, dagpath, comptype=None):
         comptype = comptype or cls._mtype
@@ -84,10 +133,14 @@ class AbstractComponent(object):
         return self.create(self.dagpath)
 
     def add(self, indices):
+        if isinstance(indices, (IndexSet, np.ndarray)):
+            indices = indices.tolist()
         try:
             self._indexed.addElements(indices)
         except TypeError:
             self._indexed.addElement(indices)
+        self._index_set = None
+        self._arrays.clear()
         return self
 
     def convert_to(self, cls, **kwargs):
@@ -109,6 +162,7 @@ class SingleIndexComponent(AbstractComponent):
     def __init__(self, dagpath, mobject=None):
         super(SingleIndexComponent, self).__init__(dagpath, mobject)
         self._indexed = self._indexed_class(self.mobject)
+        self._index_set = None
 
         self.mdag = Node(dagpath)
         self._verts = None
@@ -120,6 +174,56 @@ class SingleIndexComponent(AbstractComponent):
         self._bbox = {}
         self._points = {}
         self._normals = {}
+        self._arrays = {}
+
+    def add(self, indices):
+        """
+        Add indices to component, a computed bounding box is expanded by
+        the added points instead of being dropped.
+        """
+        if self._bbox:
+            self._check_version()
+        bboxes, self._bbox = self._bbox, {}
+        super(SingleIndexComponent, self).add(indices)
+
+        self._verts = None
+        self._map_shells = {}
+        self._mesh_shells = {}
+        self._points.clear()
+        self._normals.clear()
+
+        if bboxes:
+            if isinstance(indices, IndexSet):
+                indices = indices.array
+            indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+            if not (self.is_vert() or self.is_map()):
+                indices = self.topology.convert(indices, self.type, MFn.kMeshVertComponent)
+
+            for space, bbox in bboxes.iteritems():
+                if self.is_map():
+                    points = self.cache.get_uvs()[indices]
+                else:
+                    points = self.cache.get_points(self.dagpath, space)[indices]
+                if len(points):
+                    bbox.expand(api.MPoint(*points.min(axis=0).tolist()))
+                    bbox.expand(api.MPoint(*points.max(axis=0).tolist()))
+            self._bbox = bboxes
+        return self
+
+    def _check_version(self):
+        """
+        Drop cached values if the mesh has been edited since they were made.
+        """
+        version = self.cache.version
+        if version != self._version:
+            self._version = version
+            self._verts = None
+            self._map_shells = {}
+            self._mesh_shells = {}
+            self._bbox.clear()
+            self._points.clear()
+            self._normals.clear()
+            self._arrays.clear()
 
     def __repr__(self):
         return '{}({})'.format(self.__class__.__name__, str(self))
@@ -162,13 +266,31 @@ class SingleIndexComponent(AbstractComponent):
     def __contains__(self, index):
         return index in self.indices
 
+    def _combine(self, other, operation):
+        if not (self.dagpath == other.dagpath and self.type == other.type):
+            raise InvalidComponentSelection('{} is not same component.'.format(other))
+        return self.new().add(operation(self.indices, other.indices))
+
+    def __or__(self, other):
+        return self._combine(other, IndexSet.union)
+
+    def __and__(self, other):
+        return self._combine(other, IndexSet.intersection)
+
+    def __sub__(self, other):
+        return self._combine(other, IndexSet.difference)
+
+    def __xor__(self, other):
+        return self._combine(other, IndexSet.symmetric_difference)
+
     @property
     def bbox(self):
+        self._check_version()
         if self.space not in self._bbox:
-            pmax = api.MPoint(map(max, itertools.izip(*self.points)))
-            pmin = api.MPoint(map(min, itertools.izip(*self.points)))
-
-            bbox = BoundingBox(pmax, pmin)
+            bbox = BoundingBox()
+            if len(self.points_array):
+                bbox.expand(api.MPoint(*self.points_array.min(axis=0).tolist()))
+                bbox.expand(api.MPoint(*self.points_array.max(axis=0).tolist()))
             if self._mtype == MFn.kMeshMapComponent:
                 bbox.boxtype = '2D'
             self._bbox[self.space] = bbox
@@ -180,19 +302,23 @@ class SingleIndexComponent(AbstractComponent):
 
     @property
     def indices(self):
-        return self._indexed.getElements()
+        """
+        Sorted `IndexSet` of the component indices, kept until indices are
+        added.
+        """
+        if self._index_set is None:
+            self._index_set = IndexSet(get_index_array(self._indexed.getElements()))
+        return self._index_set
 
     @property
     def points(self):
+        self._check_version()
         if self.space not in self._points:
-            pts = self.mesh.getPoints(self.space)
-            if self.type in [MFn.kMeshMapComponent, MFn.kMeshVertComponent]:
-                if self.type == MFn.kMeshMapComponent:
-                    pts = list(itertools.izip(*self.mesh.getUVs()))
-                indices = self.indices
-            else:
-                indices = self.vertices
-            self._points[self.space] = ObjectDict({idx: pts[idx] for idx in indices})
+            point = tuple if self.is_map() else api.MPoint
+            self._points[self.space] = ObjectDict({
+                idx: point(pts) for idx, pts in itertools.izip(
+                    self.point_index_array.tolist(), self.points_array.tolist())
+            })
         return self._points[self.space]
 
     @property
@@ -202,44 +328,113 @@ class SingleIndexComponent(AbstractComponent):
         return self._normals
 
     @property
-    def map_shells(self):
+    def index_array(self):
         """
-        Shells are represented by a set of vertices.
+        Component indices as an integer array, lines up with ``indices``.
         """
-        if not self._map_shells:
-            count, array = self.mesh.getUvShellsIds()
-            if self.is_complete():
-                wanted = set(list(xrange(count)))
+        return self.indices.array
+
+    @property
+    def point_index_array(self):
+        """
+        Point indices lining up with the rows of ``points_array`` and
+        ``normals_array``.
+        """
+        if self.type == MFn.kMeshVertComponent:
+            return self.index_array
+        self._check_version()
+        if 'point_index' not in self._arrays:
+            self._arrays['point_index'] = self.topology.convert(
+                self.index_array, self.type, MFn.kMeshVertComponent
+            )
+        return self._arrays['point_index']
+
+    @property
+    def uv_index_array(self):
+        """
+        Uv indices lining up with the rows of ``uv_array``.
+        """
+        self._check_version()
+        if 'uv_index' not in self._arrays:
+            self._arrays['uv_index'] = self.topology.convert(
+                self.point_index_array, MFn.kMeshVertComponent, MFn.kMeshMapComponent
+            )
+        return self._arrays['uv_index']
+
+    @property
+    def points_array(self):
+        """
+        Return component points as a contiguous ``(N, 3)`` float array.
+        """
+        self._check_version()
+        key = ('points', self.space)
+        if key not in self._arrays:
+            points = self.cache.get_points(self.dagpath, self.space)
+            self._arrays[key] = points[self.point_index_array]
+        return self._arrays[key]
+
+    @property
+    def normals_array(self):
+        """
+        Return component vertex normals as a contiguous ``(N, 3)`` float array.
+        """
+        self._check_version()
+        key = ('normals', self.space)
+        if key not in self._arrays:
+            normals = self.cache.get_normals(self.dagpath, self.space)
+            self._arrays[key] = normals[self.point_index_array]
+        return self._arrays[key]
+
+    @property
+    def uv_array(self):
+        """
+        Return component uvs as a contiguous ``(N, 2)`` float array.
+        """
+        self._check_version()
+        if 'uvs' not in self._arrays:
+            self._arrays['uvs'] = self.cache.get_uvs()[self.uv_index_array]
+        return self._arrays['uvs']
+
+    @property
+    def kdtree(self):
+        """
+        Return `KDTree` over ``points_array``, tree indices are rows of
+        ``point_index_array``.
+        """
+        self._check_version()
+        key = ('kdtree', self.space)
+        if key not in self._arrays:
+            # Trees over every point are shared through the mesh cache.
+            count = self.topology.num_uvs if self.is_map() else self.topology.num_verts
+            if len(self.point_index_array) != count:
+                self._arrays[key] = KDTree(self.points_array)
+            elif self.is_map():
+                self._arrays[key] = self.cache.get_uv_kdtree()
             else:
-                wanted = set([array[idx] for idx in self.indices])
+                self._arrays[key] = self.cache.get_kdtree(self.dagpath, self.space)
+        return self._arrays[key]
 
-            self._map_shells = {idx: self.new() for idx in wanted}
-            for idx, element in enumerate(array):
-                if element not in wanted:
-                    continue
-                self._map_shells[element].add(idx)
+    @property
+    def map_shells(self):
+        """
+        Shells are represented by a set of uvs.
+        """
+        self._check_version()
+        if not self._map_shells:
+            self._map_shells = {
+                idx: MeshMap.create(self.dagpath).add(shell.tolist())
+                for idx, shell in enumerate(self.get_map_shell_arrays())
+            }
         return self._map_shells
 
     @property
     def mesh_shells(self):
-        def dfs(control_set, start):
-            seen, stack = set(), [start]
-            while stack:
-                index = stack.pop()
-                if index not in seen:
-                    shell = cmds.polySelect(str(self.dagpath), q=True, ets=index, ns=True)
-                    seen.update(shell)
-                    stack.extend(control_set - seen)
-                    yield shell
-
+        self._check_version()
         if not self._mesh_shells:
-            faces = self.to_face()
-            control_set, start_index = set(faces.indices), faces.indices[0]
-            for idx, shell in enumerate(dfs(control_set, start_index)):
-                mesh_shell = faces.new().add(shell)
-                if not self.type == MFn.kMeshPolygonComponent:
-                    mesh_shell = mesh_shell.convert_to(self.type)
-                self._mesh_shells[idx] = mesh_shell
+            self._mesh_shells = {
+                idx: self.new().add(shell.tolist())
+                for idx, shell in enumerate(self.get_mesh_shell_arrays())
+            }
         return self._mesh_shells
 
     @property
@@ -250,6 +445,23 @@ class SingleIndexComponent(AbstractComponent):
     def typestr(self):
         return self.mobject.apiTypeStr
 
+    def get_range_strings(self, chunk_size=None):
+        """
+        Return the fewest selection strings, such as ``pCube1.vtx[10:250]``,
+        selecting the component.
+
+        With chunk size the strings are yielded lazily, formatting that many
+        indices at a time.
+        """
+        node = self.dagpath.partialPathName()
+        comptype = self._mtype_str[self.type]
+        if chunk_size is None:
+            return get_component_strings(node, comptype, self.index_array)
+
+        array = self.index_array
+        chunks = (array[i:i + chunk_size] for i in xrange(0, len(array), chunk_size))
+        return iter_component_strings(node, comptype, chunks)
+
     def get_complete(self):
         count = {
             MFn.kMeshVertComponent: self.mesh.numVertices,
@@ -261,67 +473,154 @@ class SingleIndexComponent(AbstractComponent):
         complete._indexed.setCompleteData(count)
         return self.__class__(self.dagpath, complete.mobject)
 
-    def get_connected_components(self, convert=True):
-        """Return connected vertices from self."""
-        def get_return_list(node):
-            new = MeshVert.create(self.dagpath).add(node)
-            if convert:
-                if self.type in (MFn.kMeshEdgeComponent,
-                                 MFn.kMeshPolygonComponent):
-                    new = new.convert_to(self.type, internal=True)
-                else:
-                    new = new.convert_to(self.type)
-            return new
-
-        def connected_vert_indices(component):
-            def dfs(node, index):
-                taken[index] = True
-                while True:
-                    updated = False
-                    for i, item in enumerate(component):
-                        if not taken[i] and not node.isdisjoint(item):
-                            taken[i] = updated = True
-                            node.update(item)
-
-                    if not updated:
-                        return node
-
-            taken = [False] * len(component)
-            for i, node in enumerate(component):
-                if not taken[i]:
-                    yield get_return_list(dfs(node, i))
+    def get_map_shell_arrays(self):
+        """
+        Return uv index arrays of the uv shells touched by self.
+        """
+        if self.is_map():
+            uvs = self.index_array
+        else:
+            uvs = self.topology.convert(self.index_array, self.type, MFn.kMeshMapComponent)
+        return self.topology.map_shells(uvs)
+
+    def get_mesh_shell_arrays(self):
+        """
+        Return index arrays of the mesh shells touched by self, in the
+        component type of self.
+        """
+        return self.topology.mesh_shells(self.type, self.index_array)
+
+    def get_connected_components(self, convert=True, as_arrays=False):
+        """
+        Yield connected pieces of self.
+
+        Pieces are found with one union-find pass over the vertex pairs of
+        the edges in self. If ``convert`` is False pieces are given as
+        vertices, with ``as_arrays`` index arrays are yielded instead of
+        components.
+        """
         # Make sure we are working with edges, edges are the most viable component to
         # try to find connected with.
-        component = self
-        if not self.type == MFn.kMeshEdgeComponent:
-            if self.type in [MFn.kMeshVertComponent, MFn.kMeshMapComponent]:
-                component = self.to_edge(internal=True)
+        topology = self.topology
+        if self.is_edge():
+            edges = self.index_array
+        else:
+            internal = self.type in [MFn.kMeshVertComponent, MFn.kMeshMapComponent]
+            edges = topology.convert(self.index_array, self.type, MFn.kMeshEdgeComponent,
+                                     internal=internal)
+
+        verts, pairs = np.unique(topology.edge_verts[edges], return_inverse=True)
+        pairs = pairs.reshape(-1, 2)
+        labels = get_component_labels(len(verts), pairs[:, 0], pairs[:, 1])
+
+        internal = self.type in (MFn.kMeshEdgeComponent, MFn.kMeshPolygonComponent)
+        for indices in get_label_groups(labels, verts):
+            if convert:
+                indices = topology.convert(indices, MFn.kMeshVertComponent, self.type,
+                                           internal=internal)
+                component = self.new()
             else:
-                component = self.to_edge()
+                component = MeshVert.create(self.dagpath)
+            yield indices if as_arrays else component.add(indices.tolist())
+
+    def get_nearest(self, points, k=1):
+        """
+        Return ``(distances, indices)`` of the k nearest component points to
+        each of points, see `KDTree.query`. Indices are point indices, uv
+        indices for maps.
+        """
+        distances, indices = self.kdtree.query(points, k)
+        found = indices >= 0
+        indices[found] = self.point_index_array[indices[found]]
+        return distances, indices
+
+    def get_within_radius(self, points, radius):
+        """
+        Return an array of point indices within radius per query point,
+        nearest first. Indices are uv indices for maps.
+        """
+        return [self.point_index_array[rows] for rows in self.kdtree.query_radius(points, radius)]
+
+    def grow(self, n=1):
+        """
+        Return new component grown by n rings of neighbouring elements.
+
+        Elements are neighbours when sharing a vertex, vertices and uvs when
+        sharing a face.
+        """
+        return self.new().add(self.topology.grow(self.type, self.index_array, n))
+
+    def shrink(self, n=1):
+        """
+        Return new component with n rings of elements neighbouring
+        unselected elements removed, the mesh border is kept.
+        """
+        return self.new().add(self.topology.shrink(self.type, self.index_array, n))
+
+    def border_ring(self, outer=False):
+        """
+        Return new component of elements in self neighbouring unselected
+        elements, or with ``outer`` the ring of elements around self.
+        """
+        return self.new().add(self.topology.border_ring(self.type, self.index_array, outer))
 
-        # Sorting the edge indices into shared sets will make the code run six times
-        # faster in dfs.
-        edge_indices = (component.mesh.getEdgeVertices(e) for e in component.indices)
-        index_vert_map = collections.defaultdict(set)
-        for edge in edge_indices:
-            index_vert_map[edge[0]].update(edge)
+    @property
+    def vert_index_array(self):
+        """
+        Vertex indices of component, the vertices of the uvs for maps.
+        """
+        if not self.is_map():
+            return self.point_index_array
+        verts = self.topology.uv_verts[self.index_array]
+        return np.unique(verts[verts >= 0])
+
+    def get_hop_distances(self, max_distance=None):
+        """
+        Return number of edges from the closest vertex of self to each
+        vertex of the mesh, ``inf`` beyond max distance.
+        """
+        offsets, neighbours, _ = self.topology.vertex_adjacency()
+        return get_hop_distances(offsets, neighbours, self.vert_index_array, max_distance)
+
+    def get_geodesic_distances(self, max_distance=None):
+        """
+        Return length of the shortest edge path from the closest vertex of
+        self to each vertex of the mesh, ``inf`` beyond max distance.
+        """
+        offsets, neighbours, _ = self.cache.get_adjacency_lists()
+        lengths = self.cache.get_adjacency_lengths(self.dagpath, self.space)
+        return get_geodesic_distances(offsets, neighbours, lengths, self.vert_index_array,
+                                      max_distance)
 
-        return connected_vert_indices(index_vert_map.values())
+    def mirrored(self, axis=0, tolerance=DEFAULT_TOLERANCE):
+        """
+        Return new component of the elements mirroring self across the
+        object space plane normal to axis, given as an index or ``'x'``,
+        ``'y'`` or ``'z'``. Elements without a mirror are left out.
+        """
+        if isinstance(axis, basestring):
+            axis = 'xyz'.index(axis.lower())
+        mirror = self.cache.get_mirror_map(self.type, axis, tolerance)[self.index_array]
+        return self.new().add(mirror[mirror >= 0])
+
+    def border_mask(self):
+        """
+        Return boolean array, True where the indices of self are on the
+        mesh border. Lines up with ``indices``.
+        """
+        return self.topology.border_mask(self.type)[self.index_array]
+
+    def border_indices(self):
+        """
+        Return index array of the indices of self on the mesh border.
+        """
+        return self.index_array[self.border_mask()]
 
     def is_border(self, index):
         """
         Check if component index is on border of mesh.
         """
-        if self.type == api.MFn.kMeshPolygonComponent:
-            return self.mesh.onBoundary(index)
-        elif self.type == api.MFn.kMeshEdgeComponent:
-            return cmds.polySelect(self.dagpath, q=True, edgeBorder=index, ns=True) or False
-        else:
-            edge = self.new().add(index).to_edge()
-            return any(
-                [cmds.polySelect(self.dagpath, q=True, edgeBorder=i, ns=True) for i in edge.indices]
-            )
-        return False
+        return bool(self.topology.border_mask(self.type)[index])
 
     def is_complete(self):
         return {
@@ -363,6 +662,72 @@ class SingleIndexComponent(AbstractComponent):
     def translate(self, **kwargs):
         cmds.xform(self.cmdslist(), **kwargs)
 
+    def set_points(self, points):
+        """
+        Set component points in one undoable ``setPoints`` call.
+
+        Rows of points line up with ``points_array`` and are given in the
+        space of the component.
+        """
+        indices = self.point_index_array
+        points = np.asarray(points, dtype=np.float64).reshape(len(indices), 3)
+        if self.space == api.MSpace.kWorld:
+            inverse = get_matrix_array(self.dagpath.inclusiveMatrixInverse())
+            points = points.dot(inverse[:3, :3]) + inverse[3, :3]
+
+        old = self.cache.get_points(self.dagpath, api.MSpace.kObject)
+        new = old.copy()
+        new[indices] = points
+
+        mesh = self.mesh
+        run_undoable(
+            lambda: mesh.setPoints(api.MPointArray(new.tolist()), api.MSpace.kObject),
+            lambda: mesh.setPoints(api.MPointArray(old.tolist()), api.MSpace.kObject),
+        )
+
+    def offset_points(self, offsets):
+        """
+        Move component points by a single offset or one offset per point.
+        """
+        self.set_points(self.points_array + np.asarray(offsets, dtype=np.float64))
+
+    def transform_points(self, matrix):
+        """
+        Transform component points by a ``(4, 4)`` matrix in the space of
+        the component.
+        """
+        matrix = get_matrix_array(matrix)
+        self.set_points(self.points_array.dot(matrix[:3, :3]) + matrix[3, :3])
+
+    def set_uvs(self, uvs):
+        """
+        Set component uvs in one undoable ``setUVs`` call, rows line up
+        with ``uv_array``.
+        """
+        indices = self.uv_index_array
+        old = self.cache.get_uvs()
+        new = old.copy()
+        new[indices] = np.asarray(uvs, dtype=np.float64).reshape(len(indices), 2)
+
+        mesh = self.mesh
+        run_undoable(
+            lambda: mesh.setUVs(new[:, 0].tolist(), new[:, 1].tolist()),
+            lambda: mesh.setUVs(old[:, 0].tolist(), old[:, 1].tolist()),
+        )
+
+    def offset_uvs(self, offsets):
+        """
+        Move component uvs by a single offset or one offset per uv.
+        """
+        self.set_uvs(self.uv_array + np.asarray(offsets, dtype=np.float64))
+
+    def transform_uvs(self, matrix):
+        """
+        Transform component uvs by a ``(3, 3)`` affine matrix.
+        """
+        matrix = np.asarray(matrix, dtype=np.float64).reshape(3, 3)
+        self.set_uvs(self.uv_array.dot(matrix[:2, :2]) + matrix[2, :2])
+
     def to_vert(self, **kwargs):
         return self.convert_to(MFn.kMeshVertComponent, **kwargs)
 
@@ -372,14 +737,10 @@ class SingleIndexComponent(AbstractComponent):
         # border the edges won't be returned. We perform a manual convert
         # and add the missing edges to the converted object.
         if self.is_face() and 'border' in kwargs:
-            border_edges = []
-            for face in self:
-                if self.is_border(face):
-                    n_edge = self.new().add(face).to_edge()
-                    for idx in n_edge:
-                        if n_edge.is_border(idx):
-                            border_edges.append(idx)
-            converted.add(border_edges)
+            edges = self.topology.convert(self.border_indices(), self.type,
+                                          MFn.kMeshEdgeComponent)
+            is_border = self.topology.border_mask(MFn.kMeshEdgeComponent)
+            converted.add(edges[is_border[edges]].tolist())
         return converted
 
     def to_face(self, **kwargs):
@@ -395,8 +756,15 @@ class SingleIndexComponent(AbstractComponent):
             MFn.kMeshPolygonComponent: (MeshPolygon, {'toFace': True}),
             MFn.kMeshMapComponent: (MeshMap, {'toUV': True}),
         }[comptype]
-        kwargs.update(kw)
-        return super(SingleIndexComponent, self).convert_to(cls, **kwargs)
+        # Conversions the topology can't answer are left to Maya.
+        if set(kwargs) - {'internal', 'border'}:
+            kwargs.update(kw)
+            return super(SingleIndexComponent, self).convert_to(cls, **kwargs)
+
+        indices = self.topology.convert(self.index_array, self.type, comptype,
+                                        internal=kwargs.get('internal', False),
+                                        border=kwargs.get('border', False))
+        return cls.create(self.dagpath).add(indices.tolist())
 
     def toggle(self, other=None):
         if other is None:
@@ -420,98 +788,217 @@ class MeshVert(SingleIndexComponent):
 
     @property
     def normals(self):
+        self._check_version()
         if self.space not in self._normals:
             self._normals[self.space] = self.mesh.getVertexNormals(False, self.space)
         return self._normals[self.space]
 
+    def shortest_path_to(self, other, as_arrays=False):
+        """
+        Return ``(verts, edges)`` of the shortest edge path from the first
+        vertex of self to other, a ``MeshVert`` or vertex index.
 
-def get_border_loop_indices_from_edge_index(index):
-    return set(sorted([int(i) for i in cmds.polySelect(q=True, edgeBorder=index)]))
+        See `get_shortest_paths`, ``None`` is returned if other can't be
+        reached.
+        """
+        target = other if isinstance(other, numbers.Integral) else other.index
+        return self.get_shortest_paths([(self.index, target)], as_arrays)[0]
+
+    def get_shortest_paths(self, pairs, as_arrays=False):
+        """
+        Return ``(verts, edges)`` of the shortest edge path between each
+        ``(source, target)`` vertex index pair on the mesh of self, ``None``
+        for pairs that can't be reached.
+
+        Paths are weighted by edge length and found with A*, or with one
+        Dijkstra search per source shared by several pairs. The graph is kept
+        as lists in the mesh cache, so a search only costs the region it
+        explores. ``verts`` and ``edges`` are ``MeshVert`` and ``MeshEdge``
+        components, or index arrays in walking order with ``as_arrays``.
+        """
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        _, neighbours, edges = self.topology.vertex_adjacency()
+        offsets, neighbour_list, _ = self.cache.get_adjacency_lists()
+        lengths = self.cache.get_adjacency_lengths(self.dagpath, self.space)
+        points = self.cache.get_point_lists(self.dagpath, self.space)
+
+        def get_estimate(target):
+            x, y, z = points[target]
+
+            def estimate(node):
+                px, py, pz = points[node]
+                return math.sqrt((px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2)
+            return estimate
+
+        paths = get_shortest_paths(offsets, neighbour_list, lengths, pairs[:, 0], pairs[:, 1],
+                                   get_estimate)
+        result = []
+        for source, path in itertools.izip(pairs[:, 0], paths):
+            if path is None:
+                result.append(None)
+                continue
+            verts = np.concatenate(([source], neighbours[path])).astype(np.int64)
+            path_edges = edges[path]
+            if not as_arrays:
+                verts = MeshVert.create(self.dagpath).add(verts)
+                path_edges = MeshEdge.create(self.dagpath).add(path_edges)
+            result.append((verts, path_edges))
+        return result
+
+
+def get_border_loop_indices_from_edge_index(index, dagpath=None):
+    """
+    Return set of edge indices in the border loop through edge index, on the
+    mesh at dagpath or the first selected mesh.
+    """
+    if dagpath is None:
+        dagpath = api.MGlobal.getActiveSelectionList().getDagPath(0)
+    loops = get_mesh_cache(dagpath).topology.border_loops([index])
+    return set(loops[0].tolist()) if loops else set()
 
 
 def get_border_loop_indices_from_edge_object(component):
-    return set([
-        tuple(border for border in get_border_loop_indices_from_edge_index(idx))
-        for idx in component.indices
-    ])
+    """
+    Return set with a tuple of edge indices per border loop through the
+    edges of component.
+    """
+    return set(tuple(loop.tolist()) for loop in component.topology.border_loops(
+        component.index_array))
 
 
-def get_outer_and_inner_edges_from_edge_loop(loop):
+def get_outer_and_inner_edges_from_edge_loop(loop, as_arrays=False):
     """
-    Return outer edges from a component object containing connected
-    edges.
+    Return outer edges, as vertices, and inner vertices from a component
+    object containing connected edges.
+
+    Vertices used by a single edge are outer and give one end edge each.
+    With ``as_arrays`` a ``(N, 2)`` array of end edge vertex pairs and an
+    inner vertex array are returned instead of components.
     """
-    # Get tuples with vert ids representing edges
-    # edges = connected.vertices
-    edge_vert_map = loop.vertices
-    indices = set(edge_vert_map)
-
-    # Get verts with least occurances
-    vert_count = collections.Counter(sum(edge_vert_map.itervalues(), ()))
-    outer_verts = set(i[0] for i in vert_count.most_common()[-2:])
-    inner_verts = indices - outer_verts
-
-    edge_list = []
-    for i in outer_verts:
-        edge = MeshVert.create(loop.dagpath)
-        for idx, verts in edge_vert_map.viewitems():
-            if i in verts:
-                edge.add(verts); break
-        edge_list.append(edge)
-    return edge_list, MeshVert.create(loop.dagpath).add(inner_verts)
+    edge_verts = loop.topology.edge_verts[loop.index_array]
+    verts, counts = np.unique(edge_verts, return_counts=True)
+    is_outer = np.zeros(loop.topology.num_verts, dtype=bool)
+    is_outer[verts[counts == 1]] = True
+
+    end_edges = edge_verts[np.flatnonzero(is_outer[edge_verts.ravel()]) // 2]
+    inner_verts = verts[counts > 1]
+    if as_arrays:
+        return end_edges, inner_verts
+
+    edge_list = [MeshVert.create(loop.dagpath).add(verts.tolist()) for verts in end_edges]
+    return edge_list, MeshVert.create(loop.dagpath).add(inner_verts.tolist())
 
 
 def get_vert_order_from_connected_edges(edge_vertices):
     """
-    .. note:: Should probably be moved to mampy.
+    Return vertices of connected edges, given as vertex pairs, in walking
+    order. Only the first chain is returned, see `MeshEdge.get_chains` for
+    ordering several chains.
     """
-    idx = 0
-    next_ = None
-    sorted_ = []
-    while edge_vertices:
-
-        edge = edge_vertices.pop(idx)
-        # next_ is a vert on the edge index.
-        if next_ is None:
-            next_ = edge[-1]
-
-        sorted_.append(next_)
-        for i in edge_vertices:
-            if next_ in i:
-                idx = edge_vertices.index(i)
-                next_ = i[-1] if next_ == i[0] else i[0]
-                break
-    return sorted_
+    chains = get_edge_chains(list(edge_vertices))
+    return chains[0][0].tolist() if chains else []
 
 
 class MeshEdge(SingleIndexComponent):
     _mtype = MFn.kMeshEdgeComponent
 
-    def __init__(self, dagpath, mobject=None):
-        super(MeshEdge, self).__init__(dagpath, mobject)
-        self._vert_normals = {}
-
     @classmethod
     def create(cls, dagpath):
         return super(MeshEdge, cls).create(dagpath, cls._mtype)
 
+    def get_chains(self):
+        """
+        Return a ``(verts, edges)`` index array pair per edge chain in self,
+        in walking order. Closed chains don't repeat their first vertex.
+        """
+        return get_edge_chains(self.topology.edge_verts[self.index_array], self.index_array)
+
+    def _get_edge_groups(self, groups, as_arrays):
+        if as_arrays:
+            return groups
+        return [MeshEdge.create(self.dagpath).add(group) for group in groups]
+
+    def get_loops(self, as_arrays=False):
+        """
+        Return a ``MeshEdge`` per edge loop through edges in self, loops
+        through several edges are returned once.
+
+        All loops of the mesh are labelled in one pass over the cached
+        topology, so any number of seed edges costs a single lookup.
+        """
+        return self._get_edge_groups(self.topology.edge_loops(self.index_array), as_arrays)
+
+    def get_rings(self, as_arrays=False):
+        """
+        Return a ``MeshEdge`` per edge ring through edges in self, rings
+        through several edges are returned once.
+        """
+        return self._get_edge_groups(self.topology.edge_rings(self.index_array), as_arrays)
+
+    def get_border_loops(self, as_arrays=False):
+        """
+        Return a ``MeshEdge`` per border loop through edges in self.
+        """
+        return self._get_edge_groups(self.topology.border_loops(self.index_array), as_arrays)
+
+    def to_loop(self):
+        """
+        Return new ``MeshEdge`` with the edge loops through self.
+        """
+        loops = self.get_loops(as_arrays=True)
+        return self.new().add(np.concatenate(loops) if loops else [])
+
+    def to_ring(self):
+        """
+        Return new ``MeshEdge`` with the edge rings through self.
+        """
+        rings = self.get_rings(as_arrays=True)
+        return self.new().add(np.concatenate(rings) if rings else [])
+
+    def get_outer_and_inner_verts(self, as_arrays=False):
+        """
+        Return an ``(outer, inner)`` vertex pair per connected loop in self.
+
+        Outer vertices are used by a single edge of the loop, inner by more.
+        Pairs hold ``MeshVert`` components or index arrays with ``as_arrays``.
+        """
+        loops = split_outer_and_inner_verts(self.topology.edge_verts[self.index_array])
+        if as_arrays:
+            return loops
+        return [
+            (MeshVert.create(self.dagpath).add(outer.tolist()),
+             MeshVert.create(self.dagpath).add(inner.tolist()))
+            for outer, inner in loops
+        ]
+
     @property
     def normals(self):
+        self._check_version()
         if self.space not in self._normals:
-            if self.space not in self.vert_normals:
-                self.vert_normals[self.space] = self.mesh.getVertexNormals(False,
-                                                                           self.space)
-
-            get_edge_verts = self.mesh.getEdgeVertices
-            get_vert_normals = self.vert_normals[self.space]
             self._normals[self.space] = ObjectDict({
-                idx: get_average_vert_normal(get_vert_normals, get_edge_verts(idx))
-                for idx in self.indices
+                idx: api.MVector(normal) for idx, normal in itertools.izip(
+                    self.index_array.tolist(), self.get_edge_normals_array().tolist())
             })
         return self._normals[self.space]
 
+    def get_edge_normals_array(self, mode='vertex'):
+        """
+        Return edge normals lining up with ``index_array`` as a ``(N, 3)``
+        float array.
+
+        Mode ``vertex`` averages the normals of the edge vertices, mode
+        ``face`` the normals of the faces using the edge.
+        """
+        self._check_version()
+        key = ('edge_normals', mode, self.space)
+        if key not in self._arrays:
+            normals = self.cache.get_edge_normals(self.dagpath, self.space, mode)
+            self._arrays[key] = normals[self.index_array]
+        return self._arrays[key]
+
     @property
     def vertices(self):
+        self._check_version()
         if self._verts is None:
             get_vert = self.mesh.getEdgeVertices
             self._verts = IndicesDict({idx: get_vert(idx) for idx in self.indices})
@@ -527,14 +1014,30 @@ class MeshPolygon(SingleIndexComponent):
 
     @property
     def normals(self):
-        if not self._normals:
-            self._normals = ObjectDict(
-                {idx: self.mesh.getPolygonNormal(idx) for idx in self.indices}
-            )
-        return self._normals
+        self._check_version()
+        if self.space not in self._normals:
+            self._normals[self.space] = ObjectDict({
+                idx: api.MVector(normal) for idx, normal in itertools.izip(
+                    self.index_array.tolist(), self.face_normals_array.tolist())
+            })
+        return self._normals[self.space]
+
+    @property
+    def face_normals_array(self):
+        """
+        Return face normals lining up with ``index_array`` as a ``(N, 3)``
+        float array.
+        """
+        self._check_version()
+        key = ('face_normals', self.space)
+        if key not in self._arrays:
+            normals = self.cache.get_face_normals(self.dagpath, self.space)
+            self._arrays[key] = normals[self.index_array]
+        return self._arrays[key]
 
     @property
     def vertices(self):
+        self._check_version()
         if self._verts is None:
             get_vert = self.mesh.getPolygonVertices
             self._verts = IndicesDict({idx: tuple(get_vert(idx)) for idx in self.indices})
@@ -550,3 +1053,40 @@ class MeshMap(SingleIndexComponent):
 
     def translate(cls, **kwargs):
         cmds.polyEditUV(list(cls), **kwargs)
+
+    def set_points(self, points):
+        self.set_uvs(points)
+
+    def offset_points(self, offsets):
+        self.offset_uvs(offsets)
+
+    def transform_points(self, matrix):
+        self.transform_uvs(matrix)
+
+    @property
+    def point_index_array(self):
+        return self.index_array
+
+    @property
+    def uv_index_array(self):
+        return self.index_array
+
+    @property
+    def points_array(self):
+        """
+        Return component uvs as a contiguous ``(N, 2)`` float array.
+        """
+        return self.uv_array
+
+    @property
+    def normals_array(self):
+        """
+        Return vertex normals of the uv vertices as a contiguous ``(N, 3)``
+        float array.
+        """
+        self._check_version()
+        key = ('normals', self.space)
+        if key not in self._arrays:
+            normals = self.cache.get_normals(self.dagpath, self.space)
+            self._arrays[key] = normals[self.topology.uv_verts[self.index_array]]
+        return self._arrays[key]
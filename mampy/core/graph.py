@@ -0,0 +1,319 @@
+"""
+This module contains graph algorithms working on ``numpy`` index arrays.
+
+Nothing in here knows about Maya, graphs are given as vertex counts and
+arrays of index pairs.
+"""
+import heapq
+
+import numpy as np
+
+
+__all__ = ['get_component_labels', 'get_label_groups', 'select_label_groups',
+           'get_edge_chains', 'split_outer_and_inner_verts', 'gather_rows', 'get_hop_distances',
+           'get_geodesic_distances', 'get_shortest_paths']
+
+
+def get_component_labels(count, a, b):
+    """
+    Label connected components of the graph with ``count`` nodes and links
+    between the index pairs ``a`` and ``b``.
+
+    Works as a disjoint set forest, each round hooks the larger root of
+    every unjoined pair onto the smaller one and flattens the forest. All
+    of it runs on whole arrays. Returns labels numbered from zero in order
+    of each component's lowest node.
+    """
+    parent = np.arange(count)
+    a = np.asarray(a, dtype=np.int64)
+    b = np.asarray(b, dtype=np.int64)
+    while True:
+        root_a, root_b = parent[a], parent[b]
+        unjoined = root_a != root_b
+        if not unjoined.any():
+            break
+        a, b = a[unjoined], b[unjoined]
+        root_a, root_b = root_a[unjoined], root_b[unjoined]
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+
+        grand_parent = parent[parent]
+        while (grand_parent != parent).any():
+            parent = grand_parent
+            grand_parent = parent[parent]
+    return np.unique(parent, return_inverse=True)[1].reshape(-1)
+
+
+def get_label_groups(labels, indices=None):
+    """
+    Return a list of index arrays, one per label in ascending label order.
+
+    If indices are given they are grouped instead of the label positions.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    if indices is None:
+        indices = np.arange(len(labels))
+    if not len(labels):
+        return []
+
+    order = np.argsort(labels, kind='mergesort')
+    labels, indices = labels[order], np.asarray(indices)[order]
+    return np.split(indices, np.flatnonzero(np.diff(labels)) + 1)
+
+
+def select_label_groups(labels, selected=None):
+    """
+    Return index arrays of label groups present at the selected positions,
+    or all groups if nothing is selected. Negative labels are ignored.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    mask = labels >= 0
+    if selected is not None and mask.any():
+        wanted = np.zeros(labels.max() + 1, dtype=bool)
+        selected_labels = labels[np.asarray(selected, dtype=np.int64)]
+        wanted[selected_labels[selected_labels >= 0]] = True
+        mask &= wanted[np.maximum(labels, 0)]
+
+    indices = np.flatnonzero(mask)
+    return get_label_groups(labels[indices], indices)
+
+
+def get_edge_chains(edge_verts, edges=None):
+    """
+    Order edges given as vertex pairs into chains.
+
+    Returns a list of ``(verts, edges)`` array pairs in walking order, one
+    per chain. Chains run through vertices shared by two edges and stop at
+    ends and junctions. An open chain has one more vertex than edges, a
+    closed chain does not repeat its first vertex, also when it starts and
+    ends at a junction. If edges are given they are returned instead of
+    positions in ``edge_verts``.
+
+    Every edge is visited once through a vertex to edge map, so any number
+    of chains is ordered in linear time.
+    """
+    edge_verts = np.asarray(edge_verts, dtype=np.int64).reshape(-1, 2)
+    edges = np.arange(len(edge_verts)) if edges is None else np.asarray(edges)
+    verts, local = np.unique(edge_verts, return_inverse=True)
+    local = local.reshape(-1, 2)
+
+    ends = local.ravel()
+    offsets = np.zeros(len(verts) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(ends, minlength=len(verts)), out=offsets[1:])
+    incident = (np.argsort(ends, kind='mergesort') // 2).tolist()
+    degree = np.diff(offsets).tolist()
+    offsets = offsets.tolist()
+    pairs = local.tolist()
+    visited = [False] * len(pairs)
+
+    def walk(vert, edge):
+        chain_verts, chain_edges = [vert], []
+        while True:
+            visited[edge] = True
+            chain_edges.append(edge)
+            a, b = pairs[edge]
+            vert = b if a == vert else a
+            if degree[vert] != 2:
+                # A loop back to the junction it started from is closed.
+                if vert != chain_verts[0]:
+                    chain_verts.append(vert)
+                break
+            first, second = incident[offsets[vert]], incident[offsets[vert] + 1]
+            edge = second if first == edge else first
+            if visited[edge]:
+                break
+            chain_verts.append(vert)
+        return verts[chain_verts], edges[chain_edges]
+
+    chains = []
+    for vert in np.flatnonzero(np.array(degree) != 2).tolist():
+        for edge in incident[offsets[vert]:offsets[vert + 1]]:
+            if not visited[edge]:
+                chains.append(walk(vert, edge))
+
+    # What is left are closed loops.
+    for edge, (vert, _) in enumerate(pairs):
+        if not visited[edge]:
+            chains.append(walk(vert, edge))
+    return chains
+
+
+def split_outer_and_inner_verts(edge_verts):
+    """
+    Split the vertices of edges, given as vertex pairs, into outer and inner
+    vertices per connected chain.
+
+    Vertices used by a single edge are outer, all others are inner. Returns
+    a list with an ``(outer, inner)`` array pair per chain.
+    """
+    verts, local, counts = np.unique(np.asarray(edge_verts, dtype=np.int64),
+                                     return_inverse=True, return_counts=True)
+    if not len(verts):
+        return []
+
+    local = local.reshape(-1, 2)
+    labels = get_component_labels(len(verts), local[:, 0], local[:, 1])
+    is_outer = counts == 1
+
+    # Sort by chain with outer vertices first, then slice each chain.
+    verts = verts[np.lexsort((~is_outer, labels))]
+    num_verts = np.bincount(labels)
+    num_outer = np.bincount(labels[is_outer], minlength=len(num_verts))
+    ends = np.cumsum(num_verts)
+    starts = (ends - num_verts).tolist()
+    splits = (ends - num_verts + num_outer).tolist()
+    return [(verts[start:split], verts[split:end])
+            for start, split, end in zip(starts, splits, ends.tolist())]
+
+
+def gather_rows(offsets, values, rows, return_rows=False, ends=None):
+    """
+    Return the concatenated values of given rows of a compressed row array,
+    row ``i`` holding ``values[offsets[i]:offsets[i + 1]]``.
+
+    Rows end at ``ends[i]`` instead if given, so rows may overlap or skip
+    values. Without values the positions in values are returned. With
+    ``return_rows`` the position in rows each value was gathered from is
+    returned as well.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = offsets[rows]
+    counts = (offsets[rows + 1] if ends is None else ends[rows]) - starts
+    shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    positions = np.arange(counts.sum()) + shift
+    gathered = positions if values is None else values[positions]
+    if return_rows:
+        return gathered, np.repeat(np.arange(len(rows)), counts)
+    return gathered
+
+
+def get_hop_distances(offsets, neighbours, seeds, max_distance=None):
+    """
+    Return the number of links from the closest seed to each node, ``inf``
+    for nodes not reached within max distance.
+
+    The graph is given as compressed rows, node ``i`` links to
+    ``neighbours[offsets[i]:offsets[i + 1]]``. Each step only visits the
+    neighbours of the nodes reached in the step before.
+    """
+    distances = np.full(len(offsets) - 1, np.inf)
+    frontier = np.unique(np.asarray(seeds, dtype=np.int64))
+    distances[frontier] = 0
+    hops = 0
+    while len(frontier) and (max_distance is None or hops < max_distance):
+        hops += 1
+        nodes = gather_rows(offsets, neighbours, frontier)
+        frontier = np.unique(nodes[np.isinf(distances[nodes])])
+        distances[frontier] = hops
+    return distances
+
+
+def _as_list(values, dtype):
+    return values if isinstance(values, list) else np.asarray(values, dtype=dtype).tolist()
+
+
+def _search(offsets, neighbours, weights, sources, max_distance=None, targets=None,
+            estimate=None):
+    """
+    Run Dijkstra's search from sources, stopping early once all targets are
+    reached. With ``estimate``, a function returning a lower bound of the
+    distance from a node to a single target, the search runs as A*.
+
+    The graph is given as lists. Returns ``(distances, previous)``
+    dictionaries of the nodes reached, previous maps each node to the
+    ``(node, position)`` in neighbours it was reached through.
+    """
+    limit = np.inf if max_distance is None else max_distance
+    remaining = None if targets is None else set(targets)
+
+    distances, previous, done = {}, {}, set()
+    heap = []
+    for source in set(sources):
+        distances[source] = 0.0
+        heap.append((0.0 if estimate is None else estimate(source), source))
+    heapq.heapify(heap)
+
+    while heap:
+        _, node = heapq.heappop(heap)
+        if node in done:
+            continue
+        done.add(node)
+        if remaining is not None:
+            remaining.discard(node)
+            if not remaining:
+                break
+
+        distance = distances[node]
+        for entry in range(offsets[node], offsets[node + 1]):
+            other = neighbours[entry]
+            new = distance + weights[entry]
+            if new < distances.get(other, np.inf) and new <= limit:
+                distances[other] = new
+                previous[other] = (node, entry)
+                heapq.heappush(heap, (new if estimate is None else new + estimate(other),
+                                      other))
+    return distances, previous
+
+
+def get_geodesic_distances(offsets, neighbours, weights, seeds, max_distance=None):
+    """
+    Return the weighted distance along links from the closest seed to each
+    node, ``inf`` for nodes not reached within max distance.
+
+    The graph is given as compressed rows as in `get_hop_distances`,
+    ``weights`` holds the length of each link. Nodes further away than max
+    distance are never expanded. Arrays given as lists are used as they
+    are, so searches with a small max distance only cost the region they
+    reach.
+    """
+    seeds = np.asarray(seeds, dtype=np.int64).tolist()
+    reached, _ = _search(_as_list(offsets, np.int64), _as_list(neighbours, np.int64),
+                         _as_list(weights, np.float64), seeds, max_distance)
+    distances = np.full(len(offsets) - 1, np.inf)
+    if reached:
+        distances[list(reached)] = list(reached.values())
+    return distances
+
+
+def get_shortest_paths(offsets, neighbours, weights, sources, targets, get_estimate=None):
+    """
+    Return the shortest path between each source and target node as a list
+    of positions in neighbours walked in order, ``None`` where the target
+    can't be reached.
+
+    The graph is given as in `get_geodesic_distances`. Pairs sharing a
+    source are found in one search. ``get_estimate`` may be a function
+    returning an estimate function for a target as taken by A*, searches
+    for a single target then run as A*. Arrays given as lists are used as
+    they are, so repeated searches can skip converting the whole graph.
+    """
+    offsets = _as_list(offsets, np.int64)
+    neighbours = _as_list(neighbours, np.int64)
+    weights = _as_list(weights, np.float64)
+    sources = np.asarray(sources, dtype=np.int64).tolist()
+    targets = np.asarray(targets, dtype=np.int64).tolist()
+
+    searches = {}
+    for source, target in zip(sources, targets):
+        searches.setdefault(source, set()).add(target)
+
+    paths = []
+    for source, target in zip(sources, targets):
+        if not isinstance(searches[source], tuple):
+            source_targets = searches[source]
+            estimate = None
+            if get_estimate is not None and len(source_targets) == 1:
+                estimate = get_estimate(target)
+            searches[source] = _search(offsets, neighbours, weights, [source],
+                                       targets=source_targets, estimate=estimate)
+
+        distances, previous = searches[source]
+        if target not in distances:
+            paths.append(None)
+            continue
+
+        path = []
+        while target != source:
+            target, entry = previous[target]
+            path.append(entry)
+        paths.append(path[::-1])
+    return paths
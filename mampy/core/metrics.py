@@ -0,0 +1,131 @@
+"""
+This module contains functions measuring mesh components.
+
+Metrics are computed for the whole mesh in one pass over the cached point
+buffer and face vertex arrays and kept in the mesh cache. Component
+functions return arrays lining up with the component ``index_array``.
+"""
+import numpy as np
+
+from maya.api.OpenMaya import MFn
+
+from mampy.core.exceptions import InvalidComponentSelection
+
+
+__all__ = ['get_mesh_edge_lengths', 'get_mesh_face_areas', 'get_mesh_face_centroids',
+           'get_mesh_uv_areas', 'get_texel_densities', 'get_edge_lengths', 'get_face_areas',
+           'get_face_centroids', 'get_uv_areas', 'get_texel_density']
+
+
+def get_mesh_edge_lengths(topology, points):
+    """
+    Return the length of each edge of topology.
+    """
+    delta = points[topology.edge_verts[:, 1]] - points[topology.edge_verts[:, 0]]
+    return np.sqrt(np.einsum('ij,ij->i', delta, delta))
+
+
+def get_mesh_face_areas(topology, points):
+    """
+    Return the area of each face of topology.
+    """
+    vectors = topology.face_vectors(points)
+    return 0.5 * np.sqrt(np.einsum('ij,ij->i', vectors, vectors))
+
+
+def get_mesh_face_centroids(topology, points):
+    """
+    Return the centroid of each face of topology, the average of its
+    vertices as ``MItMeshPolygon.center``.
+    """
+    counts = np.diff(topology.face_offsets).astype(np.float64)
+    face_points = points[topology.fv_vert]
+    return np.column_stack([
+        np.bincount(topology.fv_face, face_points[:, axis], minlength=topology.num_faces)
+        for axis in range(points.shape[1])
+    ]) / np.maximum(counts, 1)[:, np.newaxis]
+
+
+def get_mesh_uv_areas(topology, uvs):
+    """
+    Return the uv area of each face of topology, faces missing uvs get an
+    area of zero.
+    """
+    if not len(uvs):
+        return np.zeros(topology.num_faces)
+    has_uvs = np.bincount(topology.fv_face, topology.fv_uv < 0,
+                          minlength=topology.num_faces) == 0
+    areas = 0.5 * np.abs(topology.face_vectors(uvs, np.maximum(topology.fv_uv, 0)))
+    return np.where(has_uvs, areas, 0.0)
+
+
+def get_texel_densities(areas, uv_areas, texture_size=1024):
+    """
+    Return texel density, pixels per unit length, from face and uv areas
+    for a square texture of ``texture_size`` pixels.
+
+    Faces without area or uvs get a density of zero.
+    """
+    ratio = uv_areas / np.where(areas > 0, areas, np.inf)
+    return np.sqrt(ratio) * texture_size
+
+
+def _check_type(component, mtype):
+    if component.type != mtype:
+        raise InvalidComponentSelection('{} is not a {} component.'.format(
+            component, component._mtype_str[mtype]))
+
+
+def _get_space_metric(component, name, function):
+    cache = component.cache
+    return cache.get_in_space(name, component.dagpath, component.space, lambda: function(
+        cache.topology, cache.get_points(component.dagpath, component.space)
+    ))
+
+
+def get_edge_lengths(component):
+    """
+    Return length of each edge in component.
+    """
+    _check_type(component, MFn.kMeshEdgeComponent)
+    lengths = component.cache.get_edge_lengths(component.dagpath, component.space)
+    return lengths[component.index_array]
+
+
+def get_face_areas(component):
+    """
+    Return area of each face in component.
+    """
+    _check_type(component, MFn.kMeshPolygonComponent)
+    areas = _get_space_metric(component, 'face_areas', get_mesh_face_areas)
+    return areas[component.index_array]
+
+
+def get_face_centroids(component):
+    """
+    Return centroid of each face in component as a ``(N, 3)`` array.
+    """
+    _check_type(component, MFn.kMeshPolygonComponent)
+    centroids = _get_space_metric(component, 'face_centroids', get_mesh_face_centroids)
+    return centroids[component.index_array]
+
+
+def get_uv_areas(component):
+    """
+    Return uv area of each face in component.
+    """
+    _check_type(component, MFn.kMeshPolygonComponent)
+    cache = component.cache
+    areas = cache.get('uv_areas', lambda: get_mesh_uv_areas(cache.topology, cache.get_uvs()))
+    return areas[component.index_array]
+
+
+def get_texel_density(component, texture_size=1024):
+    """
+    Return texel density, pixels per unit length, of each face in component
+    for a square texture of ``texture_size`` pixels.
+
+    Faces without area or uvs get a density of zero.
+    """
+    return get_texel_densities(get_face_areas(component), get_uv_areas(component),
+                               texture_size)
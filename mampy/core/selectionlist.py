@@ -5,19 +5,35 @@ Module to store containers.
 from __future__ import absolute_import, unicode_literals
 
 import logging
+import itertools
+import collections
 from abc import ABCMeta, abstractmethod
 
+import numpy as np
+
 from maya import cmds
 from maya.api import OpenMaya as api
 
 
-from mampy.core.components import SingleIndexComponent
+from mampy.core.arrays import get_index_array
+from mampy.core.components import SingleIndexComponent, get_components_from_strings
 from mampy.core.dagnodes import Node, DependencyNode, Plug
 from mampy.core.exceptions import OrderedSelectionsNotSet
+from mampy.core.undo import run_undoable
 
 logger = logging.getLogger(__name__)
 
 
+COMPONENT_TYPES = frozenset(cls._mtype for cls in SingleIndexComponent.__subclasses__())
+
+SELECT_MODES = {
+    'replace': api.MGlobal.kReplaceList,
+    'add': api.MGlobal.kAddToList,
+    'toggle': api.MGlobal.kXORWithList,
+    'remove': api.MGlobal.kRemoveFromList,
+}
+
+
 class AbstractSelectionList(object):
     __metaclass__ = ABCMeta
 
@@ -66,6 +82,14 @@ class AbstractSelectionList(object):
     def from_selection(cls):
         return cls(cmds.ls(sl=True))
 
+    @classmethod
+    def from_active(cls, ordered=False):
+        """
+        Return list of the active selection, read from the api without
+        converting it to selection strings.
+        """
+        return cls(api.MGlobal.getActiveSelectionList(ordered))
+
     @classmethod
     def from_ls(cls, *args, **kwargs):
         merge = True
@@ -78,6 +102,18 @@ class AbstractSelectionList(object):
             merge = kwargs['merge']
         return cls(cmds.ls(*args, **kwargs), merge)
 
+    def select(self, mode='replace'):
+        """
+        Make list the active selection with mode ``replace``, ``add``,
+        ``toggle`` or ``remove``, as one undo step.
+        """
+        slist = api.MSelectionList(self._slist)
+        previous = api.MGlobal.getActiveSelectionList()
+        run_undoable(
+            lambda: api.MGlobal.setActiveSelectionList(slist, SELECT_MODES[mode]),
+            lambda: api.MGlobal.setActiveSelectionList(previous),
+        )
+
     def append(self, other):
         if isinstance(other, basestring):
             self._slist.add(other)
@@ -127,56 +163,177 @@ def get_borders_from_complist(complist):
     """Get border edges from selection and return a new selection list."""
     border_edges = ComponentList()
     for component in complist:
-        borders = component.new()
-        for index in component.indices:
-            if not component.is_border(index):
-                continue
-            borders.add(index)
+        borders = component.new().add(component.border_indices().tolist())
         if borders:
             border_edges.append(borders)
     return border_edges
 
 
 class ComponentList(AbstractSelectionList):
+    """
+    List of components, component objects are created once per position and
+    reused until the list is changed.
+
+    Returned components are read only views of the list, adding to one does
+    not change the list and the next read creates the component again.
+    """
 
     def __init__(self, elements=None, merge=True):
+        self._components = {}
+        self._groups = None
         super(ComponentList, self).__init__(elements, merge)
 
     def _populate_list(self, elements, merge):
         if elements is not None:
             if isinstance(elements, api.MSelectionList):
-                self._slist = self._slist.merge(elements)
+                # Dependency nodes and plugs have no component, skip them.
+                for i in xrange(elements.length()):
+                    try:
+                        self._slist.add(elements.getComponent(i), merge)
+                    except TypeError:
+                        continue
             else:
+                # Merged strings are parsed in bulk, unmerged ones keep their
+                # order.
+                strings = []
                 for element in elements:
                     if isinstance(element, basestring):
+                        if merge:
+                            strings.append(element)
+                            continue
                         try:
                             element = api.MSelectionList().add(element).getComponent(0)
                         except TypeError:
                             continue
                     self._slist.add(element, merge)
 
+                if strings:
+                    components, rest = get_components_from_strings(strings)
+                    for component in components:
+                        self._slist.add(component.node, merge)
+                    for string in rest:
+                        try:
+                            element = api.MSelectionList().add(string).getComponent(0)
+                        except TypeError:
+                            continue
+                        self._slist.add(element, merge)
+
     def __getitem__(self, key):
         if isinstance(key, slice):
             return self.__class__(
                 [self._slist.getComponent(i) for i in xrange(*key.indices(len(self)))]
             )
         else:
-            return SingleIndexComponent(*self._slist.getComponent(key))
+            if key < 0:
+                key += len(self)
+            # Components only grow, a changed length means it was added to.
+            component, count = self._components.get(key, (None, None))
+            if component is None or len(component) != count:
+                component = SingleIndexComponent(*self._slist.getComponent(key))
+                self._components[key] = (component, len(component))
+            return component
 
     def __iter__(self):
-        return (SingleIndexComponent(*self._slist.getComponent(i)) for i in xrange(len(self)))
+        return (self[i] for i in xrange(len(self)))
 
     def __nonzero__(self):
-        result = super(ComponentList, self).__nonzero__()
-        if result:
-            return not(all(type(obj) is SingleIndexComponent for obj in self))
-        else:
-            return result
+        return self.has_components()
 
     def __contains__(self, other):
         return self._slist.hasItemPartly(*other.node)
 
+    def _clear_cache(self):
+        self._components.clear()
+        self._groups = None
+
+    def _get_types(self):
+        for i in xrange(len(self)):
+            try:
+                mobject = self._slist.getComponent(i)[1]
+            except TypeError:
+                yield None
+            else:
+                yield None if mobject.isNull() else mobject.apiType()
+
+    def get_range_strings(self, chunk_size=None):
+        """
+        Return the fewest selection strings selecting the components in
+        list, see `SingleIndexComponent.get_range_strings`. With chunk size
+        the strings are yielded lazily.
+        """
+        strings = itertools.chain.from_iterable(
+            component.get_range_strings(chunk_size) for component in self
+            if type(component) is not SingleIndexComponent
+        )
+        return strings if chunk_size else list(strings)
+
+    def has_components(self):
+        """
+        Return True if the list holds a mesh component, without creating
+        component objects.
+        """
+        return any(mtype in COMPONENT_TYPES for mtype in self._get_types())
+
+    def count(self, comptype=None):
+        """
+        Return number of entries of comptype, entries holding a mesh
+        component if comptype is None.
+        """
+        if comptype is None:
+            return sum(mtype in COMPONENT_TYPES for mtype in self._get_types())
+        return sum(mtype == comptype for mtype in self._get_types())
+
+    def get_groups(self):
+        """
+        Return ordered dictionary mapping ``(full path, component type)`` to
+        one component merging every entry of that type on the mesh.
+
+        Built in one pass over the list, the indices of each key are joined
+        as arrays. Entries without mesh components are left out.
+        """
+        if self._groups is None:
+            dagpaths, indices = {}, collections.OrderedDict()
+            it = api.MItSelectionList(self._slist)
+            while not it.isDone():
+                if it.hasComponents():
+                    dagpath, mobject = it.getComponent()
+                    mtype = mobject.apiType()
+                    if mtype in COMPONENT_TYPES:
+                        key = (dagpath.fullPathName(), mtype)
+                        dagpaths.setdefault(key, dagpath)
+                        indices.setdefault(key, []).append(get_index_array(
+                            api.MFnSingleIndexedComponent(mobject).getElements()))
+                it.next()
+
+            self._groups = collections.OrderedDict(
+                (key, SingleIndexComponent.create(dagpaths[key], key[1]).add(
+                    np.unique(np.concatenate(arrays))))
+                for key, arrays in indices.iteritems()
+            )
+        return self._groups
+
+    def append(self, other):
+        self._clear_cache()
+        return super(ComponentList, self).append(other)
+
+    def clear(self):
+        self._clear_cache()
+        return super(ComponentList, self).clear()
+
+    def extend(self, other, merge=True, strategy=api.MSelectionList.kMergeNormal):
+        self._clear_cache()
+        return super(ComponentList, self).extend(other, merge, strategy)
+
+    def replace(self, index, other):
+        self._clear_cache()
+        return super(ComponentList, self).replace(index, other)
+
+    def remove(self, index):
+        self._clear_cache()
+        return super(ComponentList, self).remove(index)
+
     def toggle(self, component):
+        self._clear_cache()
         return self._slist.toggle(*component)
 
 
@@ -185,18 +342,10 @@ class MultiComponentList(ComponentList):
     def __init__(self, elements=None, merge=True):
         super(MultiComponentList, self).__init__(elements, merge)
 
-    def _sort_elements(self, elements):
-        import collections
-        multi_map = collections.defaultdict(set)
-        for element in elements:
-            obj, _ = element.split('[')
-            multi_map[obj].add(element)
-        return multi_map
-
     def _populate_list(self, elements, merge):
         if elements is not None:
-            for elements in self._sort_elements(elements).itervalues():
-                self.append(ComponentList(elements).pop())
+            for component in ComponentList(elements).get_groups().itervalues():
+                self.append(component)
 
 
 class DagbaseList(AbstractSelectionList):
@@ -213,10 +362,21 @@ class DagbaseList(AbstractSelectionList):
     def _populate_list(self, elements, merge):
         if elements is not None:
             if isinstance(elements, api.MSelectionList):
-                self._slist = self._slist.merge(elements)
+                get = getattr(elements, self._get_func)
+                for i in xrange(elements.length()):
+                    try:
+                        self._slist.add(get(i), merge)
+                    except TypeError:
+                        continue
             else:
+                # Merged strings share one selection list, unmerged ones keep
+                # their order.
+                strings = api.MSelectionList()
                 for element in elements:
                     if isinstance(element, basestring):
+                        if merge:
+                            strings.add(element)
+                            continue
                         sl = api.MSelectionList().add(element)
                         get = getattr(sl, self._get_func)
                         try:
@@ -227,6 +387,13 @@ class DagbaseList(AbstractSelectionList):
                         element = element.dagpath
                     self._slist.add(element, merge)
 
+                get = getattr(strings, self._get_func)
+                for i in xrange(strings.length()):
+                    try:
+                        self._slist.add(get(i), merge)
+                    except TypeError:
+                        continue
+
     def __iter__(self):
         get = getattr(self._slist, self._get_func)
         for x in xrange(len(self)):
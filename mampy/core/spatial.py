@@ -0,0 +1,251 @@
+"""
+This module contains the `KDTree` class, a spatial index for batched nearest
+neighbour and radius queries on ``numpy`` point arrays.
+
+Nothing in here knows about Maya, see `MeshCache.get_kdtree` for trees built
+from the point buffer of a mesh.
+"""
+import itertools
+
+import numpy as np
+
+from mampy.core.graph import gather_rows
+
+
+__all__ = ['KDTree', 'get_mirror_indices']
+
+
+DEFAULT_TOLERANCE = 1e-4
+
+HASH_PRIMES = np.array([73856093, 19349663, 83492791], dtype=np.int64)
+
+
+def get_box_distances(points, lo, hi):
+    """
+    Return distance from each point to the matching box, zero inside.
+    """
+    delta = np.maximum(np.maximum(lo - points, points - hi), 0.0)
+    return np.sqrt(np.einsum('ij,ij->i', delta, delta))
+
+
+def get_point_distances(a, b):
+    delta = a - b
+    return np.sqrt(np.einsum('ij,ij->i', delta, delta))
+
+
+def get_cell_keys(cells):
+    """
+    Return a hash key per row of integer grid cells, different cells may
+    share a key.
+    """
+    return np.bitwise_xor.reduce(cells * HASH_PRIMES[:cells.shape[1]], axis=1)
+
+
+def get_mirror_indices(points, axis=0, tolerance=DEFAULT_TOLERANCE):
+    """
+    Return index of the point mirroring each of points across the plane
+    through the origin normal to axis, ``-1`` where no point lies within
+    tolerance.
+
+    Points are hashed into a grid with cells the size of tolerance, so each
+    mirrored point is only compared to points in its neighbouring cells.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    mirrored = points.copy()
+    mirrored[:, axis] *= -1
+
+    keys = get_cell_keys(np.floor(points / tolerance).astype(np.int64))
+    order = np.argsort(keys, kind='mergesort')
+    keys = keys[order]
+    cells = np.floor(mirrored / tolerance).astype(np.int64)
+
+    pairs = []
+    for offset in itertools.product((-1, 0, 1), repeat=points.shape[1]):
+        cell_keys = get_cell_keys(cells + offset)
+        starts = np.searchsorted(keys, cell_keys, side='left')
+        ends = np.searchsorted(keys, cell_keys, side='right')
+        candidates, queries = gather_rows(starts, order, np.arange(len(points)),
+                                          return_rows=True, ends=ends)
+        distances = get_point_distances(mirrored[queries], points[candidates])
+        within = distances <= tolerance
+        pairs.append((queries[within], candidates[within], distances[within]))
+
+    queries, candidates, distances = (np.concatenate(arrays) for arrays in zip(*pairs))
+    order = np.lexsort((distances, queries))
+    queries, first = np.unique(queries[order], return_index=True)
+    indices = np.full(len(points), -1, dtype=np.int64)
+    indices[queries] = candidates[order][first]
+    return indices
+
+
+class KDTree(object):
+    """
+    Tree of bounding boxes over points of any dimension.
+
+    Points are split at the median of the widest axis until a node holds at
+    most ``leaf_size`` points. Queries walk the tree for every query point
+    at once, as a frontier of query and node pairs pruned by the node
+    bounding boxes.
+    """
+
+    def __init__(self, points, leaf_size=16):
+        self.points = np.ascontiguousarray(points, dtype=np.float64)
+        self.leaf_size = max(leaf_size, 1)
+        self.order = np.arange(len(self.points))
+
+        starts, ends, lefts, rights, lows, highs = [], [], [], [], [], []
+        stack = [(0, len(self.points), -1, None)] if len(self.points) else []
+        while stack:
+            start, end, parent, children = stack.pop()
+            node = len(starts)
+            if children is not None:
+                children[parent] = node
+
+            indices = self.order[start:end]
+            points = self.points[indices]
+            low, high = points.min(axis=0), points.max(axis=0)
+            starts.append(start)
+            ends.append(end)
+            lefts.append(-1)
+            rights.append(-1)
+            lows.append(low)
+            highs.append(high)
+
+            if end - start > self.leaf_size:
+                axis = np.argmax(high - low)
+                middle = (end - start) // 2
+                self.order[start:end] = indices[np.argpartition(points[:, axis], middle)]
+                stack.append((start + middle, end, node, rights))
+                stack.append((start, start + middle, node, lefts))
+
+        self.starts = np.array(starts, dtype=np.int64)
+        self.ends = np.array(ends, dtype=np.int64)
+        self.lefts = np.array(lefts, dtype=np.int64)
+        self.rights = np.array(rights, dtype=np.int64)
+        self.lows = np.array(lows, dtype=np.float64).reshape(-1, self.points.shape[1])
+        self.highs = np.array(highs, dtype=np.float64).reshape(-1, self.points.shape[1])
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, len(self))
+
+    def __len__(self):
+        return len(self.points)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (
+            self.points, self.order, self.starts, self.ends, self.lefts, self.rights,
+            self.lows, self.highs
+        ))
+
+    def _get_node_points(self, queries, nodes):
+        """
+        Return ``(queries, points)`` pairs of every point below nodes.
+        """
+        points, positions = gather_rows(self.starts, self.order, nodes, return_rows=True,
+                                        ends=self.ends)
+        return queries[positions], points
+
+    def _get_pairs(self, queries, radius):
+        """
+        Return ``(queries, points, distances)`` of points within radius of
+        each query point, unordered.
+        """
+        query_ids = np.arange(len(queries))
+        nodes = np.zeros(len(queries), dtype=np.int64)
+        pairs = []
+        while len(query_ids) and len(self):
+            distances = get_box_distances(queries[query_ids], self.lows[nodes],
+                                          self.highs[nodes])
+            within = distances <= radius[query_ids]
+            query_ids, nodes = query_ids[within], nodes[within]
+
+            leaf = self.lefts[nodes] < 0
+            pair_queries, pair_points = self._get_node_points(query_ids[leaf], nodes[leaf])
+            distances = get_point_distances(queries[pair_queries], self.points[pair_points])
+            within = distances <= radius[pair_queries]
+            pairs.append((pair_queries[within], pair_points[within], distances[within]))
+
+            query_ids, nodes = query_ids[~leaf], nodes[~leaf]
+            query_ids = np.concatenate((query_ids, query_ids))
+            nodes = np.concatenate((self.lefts[nodes], self.rights[nodes]))
+
+        if not pairs:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0)
+        return tuple(np.concatenate(arrays) for arrays in zip(*pairs))
+
+    def _get_bounds(self, queries, k):
+        """
+        Return an upper bound of the distance to the k:th nearest point of
+        each query point, from the smallest node near the query holding at
+        least k points.
+        """
+        nodes = np.zeros(len(queries), dtype=np.int64)
+        while True:
+            lefts, rights = self.lefts[nodes], self.rights[nodes]
+            smallest = np.minimum(self.ends[lefts] - self.starts[lefts],
+                                  self.ends[rights] - self.starts[rights])
+            descend = np.flatnonzero((lefts >= 0) & (smallest >= k))
+            if not len(descend):
+                break
+            lefts, rights, points = lefts[descend], rights[descend], queries[descend]
+            go_right = (get_box_distances(points, self.lows[rights], self.highs[rights]) <
+                        get_box_distances(points, self.lows[lefts], self.highs[lefts]))
+            nodes[descend] = np.where(go_right, rights, lefts)
+
+        pair_queries, pair_points = self._get_node_points(np.arange(len(queries)), nodes)
+        distances = get_point_distances(queries[pair_queries], self.points[pair_points])
+        order = np.lexsort((distances, pair_queries))
+        first = np.searchsorted(pair_queries[order], np.arange(len(queries)))
+        return distances[order][first + k - 1]
+
+    def query(self, points, k=1):
+        """
+        Return ``(distances, indices)`` of the k nearest points to each of
+        points, nearest first.
+
+        Arrays are shaped ``(M,)`` for a single nearest point and ``(M, k)``
+        otherwise. If the tree holds fewer than k points missing neighbours
+        get an infinite distance and index ``-1``.
+        """
+        queries = np.asarray(points, dtype=np.float64).reshape(-1, self.points.shape[1])
+        found = min(k, len(self))
+        distances = np.full((len(queries), k), np.inf)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        if found and len(queries):
+            pair_queries, pair_points, pair_distances = self._get_pairs(
+                queries, self._get_bounds(queries, found)
+            )
+            order = np.lexsort((pair_distances, pair_queries))
+            pair_queries = pair_queries[order]
+            rank = np.arange(len(order)) - np.searchsorted(pair_queries, pair_queries)
+            nearest = rank < found
+            distances[pair_queries[nearest], rank[nearest]] = pair_distances[order][nearest]
+            indices[pair_queries[nearest], rank[nearest]] = pair_points[order][nearest]
+
+        if k == 1:
+            return distances[:, 0], indices[:, 0]
+        return distances, indices
+
+    def query_pairs(self, points, radius):
+        """
+        Return ``(queries, indices, distances)`` arrays of every point within
+        radius of points, sorted by query and distance.
+
+        Radius is a number or an array with a radius per query point.
+        """
+        queries = np.asarray(points, dtype=np.float64).reshape(-1, self.points.shape[1])
+        radius = np.broadcast_to(np.asarray(radius, dtype=np.float64), (len(queries),))
+        pair_queries, pair_points, distances = self._get_pairs(queries, radius)
+        order = np.lexsort((distances, pair_queries))
+        return pair_queries[order], pair_points[order], distances[order]
+
+    def query_radius(self, points, radius):
+        """
+        Return an index array per query point of points within radius,
+        nearest first.
+        """
+        pair_queries, indices, _ = self.query_pairs(points, radius)
+        count = len(np.asarray(points, dtype=np.float64).reshape(-1, self.points.shape[1]))
+        return np.split(indices, np.searchsorted(pair_queries, np.arange(1, count)))
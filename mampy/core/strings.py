@@ -0,0 +1,136 @@
+"""
+This module contains functions converting between Maya component selection
+strings and ``numpy`` index arrays.
+
+Nothing in here knows about Maya, strings are parsed as text.
+"""
+import re
+import collections
+
+import numpy as np
+
+from mampy.core.graph import gather_rows
+
+
+__all__ = ['get_range_indices', 'get_index_ranges', 'parse_component_strings',
+           'format_component_string', 'get_component_strings', 'iter_component_strings']
+
+
+COMPONENT_PATTERN = re.compile(
+    r'^(?P<node>[^\s\[\].]+)\.(?P<type>vtx|e|f|map)'
+    r'\[(?P<start>\d+)(?::(?P<end>\d+))?\]$',
+    re.MULTILINE,
+)
+
+
+def get_range_indices(starts, ends):
+    """
+    Return the indices of inclusive ``starts`` to ``ends`` ranges joined in
+    one array.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.maximum(np.asarray(ends, dtype=np.int64) + 1, starts)
+    return gather_rows(starts, None, np.arange(len(starts)), ends=ends)
+
+
+def get_index_ranges(indices):
+    """
+    Return ``(starts, ends)`` arrays of the inclusive runs of consecutive
+    values in indices.
+    """
+    indices = np.unique(np.asarray(indices, dtype=np.int64))
+    if not len(indices):
+        return indices, indices
+    breaks = np.flatnonzero(np.diff(indices) != 1) + 1
+    starts = indices[np.concatenate(([0], breaks))]
+    ends = indices[np.concatenate((breaks - 1, [len(indices) - 1]))]
+    return starts, ends
+
+
+def parse_component_strings(strings):
+    """
+    Parse single index mesh component strings such as ``pCube1.vtx[10:250]``.
+
+    Returns ``(components, rest)``, components is an ordered dictionary
+    mapping each ``(node, type)`` pair to a sorted unique index array, type
+    being ``vtx``, ``e``, ``f`` or ``map``. Rest lists the strings that are
+    not single index mesh components, in given order.
+
+    All strings are matched with one regular expression pass and ranges are
+    expanded on arrays.
+    """
+    strings = list(strings)
+    matches = COMPONENT_PATTERN.findall('\n'.join(strings))
+    rest = []
+    if len(matches) != len(strings):
+        rest = [string for string in strings if not COMPONENT_PATTERN.match(string)]
+
+    components = collections.OrderedDict()
+    if not matches:
+        return components, rest
+
+    nodes, types, starts, ends = zip(*matches)
+    keys = collections.OrderedDict.fromkeys(zip(nodes, types))
+    key_ids = dict((key, i) for i, key in enumerate(keys))
+    labels = np.array([key_ids[key] for key in zip(nodes, types)], dtype=np.int64)
+    starts = np.array(starts, dtype=np.int64)
+    ends = np.array([end or start for start, end in zip(starts.tolist(), ends)],
+                    dtype=np.int64)
+
+    counts = np.maximum(ends - starts + 1, 0)
+    indices = get_range_indices(starts, ends)
+    labels = np.repeat(labels, counts)
+
+    # Sort by key then index, each key is a run of unique indices.
+    order = np.lexsort((indices, labels))
+    labels, indices = labels[order], indices[order]
+    unique = np.ones(len(indices), dtype=bool)
+    unique[1:] = (labels[1:] != labels[:-1]) | (indices[1:] != indices[:-1])
+    labels, indices = labels[unique], indices[unique]
+
+    bounds = np.searchsorted(labels, np.arange(len(keys) + 1))
+    for i, key in enumerate(keys):
+        if bounds[i] < bounds[i + 1]:
+            components[key] = indices[bounds[i]:bounds[i + 1]]
+    return components, rest
+
+
+def format_component_string(node, comptype, start, end):
+    if start == end:
+        return '{}.{}[{}]'.format(node, comptype, start)
+    return '{}.{}[{}:{}]'.format(node, comptype, start, end)
+
+
+def get_component_strings(node, comptype, indices):
+    """
+    Return the fewest selection strings, such as ``pCube1.vtx[10:250]``,
+    selecting indices of component type on node.
+    """
+    return list(iter_component_strings(node, comptype, [indices]))
+
+
+def iter_component_strings(node, comptype, chunks):
+    """
+    Yield the fewest selection strings selecting indices given as chunks of
+    index arrays, indices ascending from one chunk to the next.
+
+    Runs continuing into the next chunk are joined, so very large selections
+    are formatted one chunk at a time.
+    """
+    start = end = None
+    for chunk in chunks:
+        starts, ends = get_index_ranges(chunk)
+        if not len(starts):
+            continue
+        if end is not None:
+            if starts[0] <= end + 1:
+                starts[0], ends[0] = start, max(ends[0], end)
+            else:
+                yield format_component_string(node, comptype, start, end)
+
+        for run_start, run_end in zip(starts[:-1].tolist(), ends[:-1].tolist()):
+            yield format_component_string(node, comptype, run_start, run_end)
+        start, end = int(starts[-1]), int(ends[-1])
+
+    if end is not None:
+        yield format_component_string(node, comptype, start, end)
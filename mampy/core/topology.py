@@ -0,0 +1,514 @@
+"""
+This module contains the `MeshTopology` class, incidence arrays between the
+vertices, edges, faces and uvs of a mesh.
+
+All conversions are answered from arrays built once per topology, no
+``cmds`` calls or selection strings are involved.
+"""
+import numpy as np
+
+from maya.api.OpenMaya import MFn
+
+from mampy.core.arrays import get_index_array, get_unit_array
+from mampy.core.graph import get_component_labels, select_label_groups, gather_rows
+
+
+__all__ = ['Incidence', 'MeshTopology']
+
+
+VERT = MFn.kMeshVertComponent
+EDGE = MFn.kMeshEdgeComponent
+FACE = MFn.kMeshPolygonComponent
+MAP = MFn.kMeshMapComponent
+
+
+def get_unique_pairs(rows, cols, num_cols):
+    """
+    Return sorted unique ``(rows, cols)`` pairs, pairs holding a negative
+    index are dropped.
+    """
+    valid = (rows >= 0) & (cols >= 0)
+    keys = np.unique(rows[valid] * num_cols + cols[valid])
+    return keys // num_cols, keys % num_cols
+
+
+def is_in_sorted(values, sorted_values):
+    """
+    Return a boolean array, True for each value found in sorted values.
+    """
+    if not len(sorted_values):
+        return np.zeros(len(values), dtype=bool)
+    pos = np.minimum(np.searchsorted(sorted_values, values), len(sorted_values) - 1)
+    return sorted_values[pos] == values
+
+
+class Incidence(object):
+    """
+    Compressed sparse row incidence between two kinds of mesh elements.
+
+    Row ``i`` holds ``indices[offsets[i]:offsets[i + 1]]``, ``rows`` holds
+    the row of each entry in ``indices``.
+    """
+
+    def __init__(self, rows, cols, count):
+        order = np.argsort(rows, kind='mergesort')
+        self.rows = rows[order]
+        self.indices = cols[order]
+        self.offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.rows, minlength=count), out=self.offsets[1:])
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, len(self))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return self.indices[self.offsets[index]:self.offsets[index + 1]]
+
+    def degree(self):
+        return np.diff(self.offsets)
+
+    def gather(self, rows, return_rows=False):
+        """
+        Return the concatenated entries of given rows, with ``return_rows``
+        the row of each entry is returned as well.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        if return_rows:
+            entries, positions = gather_rows(self.offsets, self.indices, rows, return_rows=True)
+            return entries, rows[positions]
+        return gather_rows(self.offsets, self.indices, rows)
+
+
+class MeshTopology(object):
+    """
+    Vertex, edge, face and uv incidence of a mesh.
+
+    Face vertices are stored flat, ``fv_*`` arrays hold the face, vertex,
+    uv, outgoing edge and next face vertex of each face vertex.
+    """
+
+    def __init__(self, face_counts, face_verts, edge_verts, num_verts,
+                 face_uvs=None, num_uvs=0):
+        self.num_verts = num_verts
+        self.num_edges = len(edge_verts)
+        self.num_faces = len(face_counts)
+        self.num_uvs = num_uvs
+
+        self.face_offsets = np.zeros(self.num_faces + 1, dtype=np.int64)
+        np.cumsum(face_counts, out=self.face_offsets[1:])
+
+        self.edge_verts = np.asarray(edge_verts, dtype=np.int64).reshape(-1, 2)
+        self.fv_vert = np.asarray(face_verts, dtype=np.int64)
+        self.fv_face = np.repeat(np.arange(self.num_faces), face_counts)
+        self.fv_next = np.arange(1, len(self.fv_vert) + 1)
+        self.fv_next[self.face_offsets[1:] - 1] = self.face_offsets[:-1]
+
+        keys = self._get_edge_keys(self.edge_verts[:, 0], self.edge_verts[:, 1])
+        self._edge_order = np.argsort(keys, kind='mergesort')
+        self._edge_keys = keys[self._edge_order]
+        self.fv_edge = self.find_edges(self.fv_vert, self.fv_vert[self.fv_next])
+
+        if face_uvs is None:
+            face_uvs = np.full(len(self.fv_vert), -1, dtype=np.int64)
+        self.fv_uv = np.asarray(face_uvs, dtype=np.int64)
+        self.uv_verts = np.full(num_uvs, -1, dtype=np.int64)
+        has_uv = self.fv_uv >= 0
+        self.uv_verts[self.fv_uv[has_uv]] = self.fv_vert[has_uv]
+
+        self._incidence = {}
+        self._labels = {}
+        self._borders = {}
+        self._adjacency = None
+
+    def __repr__(self):
+        return '{}(verts={}, edges={}, faces={}, uvs={})'.format(
+            self.__class__.__name__, self.num_verts, self.num_edges, self.num_faces,
+            self.num_uvs,
+        )
+
+    @classmethod
+    def from_mesh(cls, mesh):
+        """
+        Build topology from an ``api.MFnMesh``.
+        """
+        counts, verts = mesh.getVertices()
+        counts = get_index_array(counts)
+
+        get_edge = mesh.getEdgeVertices
+        edge_verts = np.array([get_edge(i) for i in xrange(mesh.numEdges)],
+                              dtype=np.int64)
+
+        face_uvs, num_uvs = None, 0
+        if mesh.numUVSets:
+            uv_counts, uv_ids = mesh.getAssignedUVs()
+            has_uvs = np.repeat(get_index_array(uv_counts) == counts, counts)
+            face_uvs = np.full(len(verts), -1, dtype=np.int64)
+            face_uvs[has_uvs] = get_index_array(uv_ids)
+            num_uvs = mesh.numUVs()
+
+        return cls(counts, get_index_array(verts), edge_verts, mesh.numVertices,
+                   face_uvs, num_uvs)
+
+    @property
+    def nbytes(self):
+        """
+        Bytes held by the topology arrays, including lazily built ones.
+        """
+        arrays = [value for value in self.__dict__.values() if isinstance(value, np.ndarray)]
+        for incidence in self._incidence.values():
+            arrays.extend([incidence.rows, incidence.indices, incidence.offsets])
+        arrays.extend(self._labels.values())
+        arrays.extend(self._borders.values())
+        arrays.extend(self._adjacency or [])
+        return sum(array.nbytes for array in arrays)
+
+    def _get_edge_keys(self, a, b):
+        return np.minimum(a, b) * self.num_verts + np.maximum(a, b)
+
+    def count(self, kind):
+        return {
+            VERT: self.num_verts,
+            EDGE: self.num_edges,
+            FACE: self.num_faces,
+            MAP: self.num_uvs,
+        }[kind]
+
+    def find_edges(self, a, b):
+        """
+        Return edge indices between vertex pairs ``a`` and ``b``, ``-1``
+        where no edge exists.
+        """
+        keys = self._get_edge_keys(np.asarray(a, dtype=np.int64),
+                                   np.asarray(b, dtype=np.int64))
+        if not self.num_edges:
+            return np.full(keys.shape, -1, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self._edge_keys, keys), self.num_edges - 1)
+        return np.where(self._edge_keys[pos] == keys, self._edge_order[pos], -1)
+
+    def face_vectors(self, points, fv_points=None):
+        """
+        Return the summed triangle cross products of each face, a vector
+        along the face normal twice as long as the face area.
+
+        Faces are fanned into triangles from their first vertex, so n-gons
+        are weighted by area. ``fv_points`` maps face vertices to rows of
+        points and defaults to ``fv_vert``. Two dimensional points give
+        signed doubled areas.
+        """
+        fv_points = self.fv_vert if fv_points is None else fv_points
+        origin = points[fv_points[self.face_offsets[:-1]]][self.fv_face]
+        a = points[fv_points] - origin
+        b = points[fv_points[self.fv_next]] - origin
+        if points.shape[1] == 2:
+            cross = a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]
+            return np.bincount(self.fv_face, cross, minlength=self.num_faces)
+
+        cross = np.cross(a, b)
+        return np.column_stack([
+            np.bincount(self.fv_face, cross[:, axis], minlength=self.num_faces)
+            for axis in range(3)
+        ])
+
+    def face_normals(self, points):
+        """
+        Return the unit normal of each face from ``(N, 3)`` points,
+        degenerate faces get a zero normal.
+        """
+        return get_unit_array(self.face_vectors(points))
+
+    def _get_pairs(self, row_kind, col_kind):
+        pairs = {
+            (VERT, EDGE): lambda: (self.edge_verts.ravel(),
+                                   np.repeat(np.arange(self.num_edges), 2)),
+            (VERT, FACE): lambda: (self.fv_vert, self.fv_face),
+            (EDGE, FACE): lambda: (self.fv_edge, self.fv_face),
+            (MAP, VERT): lambda: (self.fv_uv, self.fv_vert),
+            (MAP, EDGE): lambda: (np.concatenate((self.fv_uv, self.fv_uv[self.fv_next])),
+                                  np.concatenate((self.fv_edge, self.fv_edge))),
+            (MAP, FACE): lambda: (self.fv_uv, self.fv_face),
+        }
+        try:
+            rows, cols = pairs[(row_kind, col_kind)]()
+        except KeyError:
+            cols, rows = pairs[(col_kind, row_kind)]()
+        return get_unique_pairs(rows, cols, self.count(col_kind))
+
+    def incidence(self, row_kind, col_kind):
+        """
+        Return `Incidence` listing the ``col_kind`` elements of each
+        ``row_kind`` element.
+        """
+        key = (row_kind, col_kind)
+        if key not in self._incidence:
+            rows, cols = self._get_pairs(row_kind, col_kind)
+            self._incidence[key] = Incidence(rows, cols, self.count(row_kind))
+        return self._incidence[key]
+
+    def convert(self, indices, source, target, internal=False, border=False):
+        """
+        Convert ``source`` indices to ``target`` indices.
+
+        Works as ``cmds.polyListComponentConversion``, ``internal`` keeps
+        elements where all related source elements are given and ``border``
+        keeps related elements that are not internal.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if source == target:
+            return np.unique(indices)
+
+        incidence = self.incidence(target, source)
+        selected = np.zeros(self.count(source), dtype=bool)
+        selected[indices] = True
+
+        hits = np.bincount(incidence.rows[selected[incidence.indices]],
+                           minlength=len(incidence))
+        related = hits > 0
+        if internal or border:
+            is_internal = related & (hits == incidence.degree())
+            related = is_internal if internal else related & ~is_internal
+        return np.flatnonzero(related)
+
+    def vertex_adjacency(self):
+        """
+        Return ``(offsets, neighbours, edges)`` compressed row arrays holding
+        the vertices linked to each vertex and the edges linking them.
+        """
+        if self._adjacency is None:
+            incidence = self.incidence(VERT, EDGE)
+            neighbours = self.edge_verts[incidence.indices].sum(axis=1) - incidence.rows
+            self._adjacency = (incidence.offsets, neighbours, incidence.indices)
+        return self._adjacency
+
+    def neighbours(self, kind, indices, return_rows=False):
+        """
+        Return ``kind`` elements sharing a vertex with indices, vertices and
+        uvs are neighbours when sharing a face. Entries are not unique, with
+        ``return_rows`` the index each neighbour was reached from is
+        returned as well.
+        """
+        link = FACE if kind in (VERT, MAP) else VERT
+        links, rows = self.incidence(kind, link).gather(indices, return_rows=True)
+        incidence = self.incidence(link, kind)
+        neighbours = incidence.gather(links)
+        if return_rows:
+            return neighbours, np.repeat(rows, incidence.degree()[links])
+        return neighbours
+
+    def grow(self, kind, indices, steps=1):
+        """
+        Return indices grown by steps rings of neighbours.
+
+        Each ring only visits the neighbours of the ring before it.
+        """
+        indices = np.unique(np.asarray(indices, dtype=np.int64))
+        selected = np.zeros(self.count(kind), dtype=bool)
+        selected[indices] = True
+        frontier, rings = indices, [indices]
+        for _ in range(steps):
+            neighbours = np.unique(self.neighbours(kind, frontier))
+            frontier = neighbours[~selected[neighbours]]
+            if not len(frontier):
+                break
+            selected[frontier] = True
+            rings.append(frontier)
+        return np.unique(np.concatenate(rings))
+
+    def shrink(self, kind, indices, steps=1):
+        """
+        Return indices with steps rings of elements neighbouring unselected
+        elements removed.
+
+        Elements on the mesh border are kept unless they neighbour an
+        unselected element. After the first ring only neighbours of removed
+        elements are checked.
+        """
+        indices = np.unique(np.asarray(indices, dtype=np.int64))
+        selected = np.zeros(self.count(kind), dtype=bool)
+        selected[indices] = True
+        candidates = indices
+        for _ in range(steps):
+            neighbours, rows = self.neighbours(kind, candidates, return_rows=True)
+            removed = np.unique(rows[~selected[neighbours]])
+            if not len(removed):
+                break
+            selected[removed] = False
+            neighbours = np.unique(self.neighbours(kind, removed))
+            candidates = neighbours[selected[neighbours]]
+        return indices[selected[indices]]
+
+    def border_ring(self, kind, indices, outer=False):
+        """
+        Return the selected indices neighbouring unselected elements, or
+        with ``outer`` the unselected elements neighbouring indices.
+        """
+        indices = np.unique(np.asarray(indices, dtype=np.int64))
+        selected = np.zeros(self.count(kind), dtype=bool)
+        selected[indices] = True
+        neighbours, rows = self.neighbours(kind, indices, return_rows=True)
+        unselected = ~selected[neighbours]
+        if outer:
+            return np.unique(neighbours[unselected])
+        return np.unique(rows[unselected])
+
+    def border_mask(self, kind):
+        """
+        Return a boolean array, True for each ``kind`` element on the mesh
+        border.
+
+        Border edges are edges with a single face, other elements are on the
+        border when related to a border edge.
+        """
+        if kind not in self._borders:
+            if EDGE not in self._borders:
+                self._borders[EDGE] = self.incidence(EDGE, FACE).degree() == 1
+            if kind != EDGE:
+                incidence = self.incidence(kind, EDGE)
+                hits = incidence.rows[self._borders[EDGE][incidence.indices]]
+                self._borders[kind] = np.bincount(hits, minlength=len(incidence)) > 0
+        return self._borders[kind]
+
+    def _get_edge_pair_keys(self, a, b):
+        return np.minimum(a, b) * self.num_edges + np.maximum(a, b)
+
+    def loop_labels(self):
+        """
+        Return the edge loop label of each edge.
+
+        Loops run straight through vertices joining four edges and four
+        faces, and along the mesh border through vertices joining three
+        edges. They stop at any other vertex.
+        """
+        if 'loop' not in self._labels:
+            incidence = self.incidence(VERT, EDGE)
+            degree = incidence.degree()
+            border = self.border_mask(VERT)
+
+            # Edges meeting at a corner of a face are adjacent, the edge
+            # opposite the first edge of a vertex is the one not adjacent.
+            previous = np.empty_like(self.fv_next)
+            previous[self.fv_next] = np.arange(len(previous))
+            corners = np.unique(self._get_edge_pair_keys(self.fv_edge[previous], self.fv_edge))
+            edges = incidence.gather(np.flatnonzero((degree == 4) & ~border)).reshape(-1, 4)
+            adjacent = np.column_stack([
+                is_in_sorted(self._get_edge_pair_keys(edges[:, 0], edges[:, i]), corners)
+                for i in range(1, 4)
+            ])
+            edges = edges[(~adjacent).sum(axis=1) == 1]
+            opposite = np.argmin(adjacent[(~adjacent).sum(axis=1) == 1], axis=1)
+            others = np.array([[2, 3], [1, 3], [1, 2]])[opposite]
+            rows = np.arange(len(edges))
+
+            border_edges = incidence.gather(np.flatnonzero((degree == 3) & border)).reshape(-1, 3)
+            on_border = self.border_mask(EDGE)[border_edges]
+            border_edges = border_edges[on_border.sum(axis=1) == 2]
+            border_edges = border_edges[on_border[on_border.sum(axis=1) == 2]].reshape(-1, 2)
+
+            a = np.concatenate((edges[:, 0], edges[rows, others[:, 0]], border_edges[:, 0]))
+            b = np.concatenate((edges[rows, opposite + 1], edges[rows, others[:, 1]],
+                                border_edges[:, 1]))
+            self._labels['loop'] = get_component_labels(self.num_edges, a, b)
+        return self._labels['loop']
+
+    def ring_labels(self):
+        """
+        Return the edge ring label of each edge.
+
+        Rings run across quads from an edge to the opposite edge and stop at
+        faces with any other number of edges.
+        """
+        if 'ring' not in self._labels:
+            counts = np.diff(self.face_offsets)
+            starts = self.face_offsets[:-1][counts == 4]
+            edges = self.fv_edge[starts[:, np.newaxis] + np.arange(4)]
+            self._labels['ring'] = get_component_labels(
+                self.num_edges,
+                np.concatenate((edges[:, 0], edges[:, 1])),
+                np.concatenate((edges[:, 2], edges[:, 3])),
+            )
+        return self._labels['ring']
+
+    def border_loop_labels(self):
+        """
+        Return the border loop label of each edge, edges not on the mesh
+        border are labelled ``-1``.
+        """
+        if 'border' not in self._labels:
+            incidence = self.incidence(VERT, EDGE)
+            border = self.border_mask(EDGE)
+            on_border = border[incidence.indices]
+            count = np.bincount(incidence.rows[on_border], minlength=len(incidence))
+            # Entries are sorted by vertex, so border edge pairs are adjacent.
+            pairs = incidence.indices[on_border & (count[incidence.rows] == 2)].reshape(-1, 2)
+            labels = get_component_labels(self.num_edges, pairs[:, 0], pairs[:, 1])
+            self._labels['border'] = np.where(border, labels, -1)
+        return self._labels['border']
+
+    def edge_loops(self, indices=None):
+        """
+        Return edge index arrays of the edge loops through indices, all loops
+        if no indices are given. Each loop is returned once.
+        """
+        return select_label_groups(self.loop_labels(), indices)
+
+    def edge_rings(self, indices=None):
+        """
+        Return edge index arrays of the edge rings through indices, all rings
+        if no indices are given. Each ring is returned once.
+        """
+        return select_label_groups(self.ring_labels(), indices)
+
+    def border_loops(self, indices=None):
+        """
+        Return edge index arrays of the border loops through indices, all
+        border loops if no indices are given.
+        """
+        return select_label_groups(self.border_loop_labels(), indices)
+
+    def mesh_shell_labels(self, kind):
+        """
+        Return the mesh shell label of each ``kind`` element.
+
+        Shells are labelled in one pass over the edges, unassigned uvs are
+        labelled ``-1``.
+        """
+        if VERT not in self._labels:
+            self._labels[VERT] = get_component_labels(
+                self.num_verts, self.edge_verts[:, 0], self.edge_verts[:, 1]
+            )
+        labels = self._labels[VERT]
+        return {
+            VERT: lambda: labels,
+            EDGE: lambda: labels[self.edge_verts[:, 0]],
+            FACE: lambda: labels[self.fv_vert[self.face_offsets[:-1]]],
+            MAP: lambda: np.where(self.uv_verts >= 0, labels[self.uv_verts], -1),
+        }[kind]()
+
+    def map_shell_labels(self):
+        """
+        Return the uv shell label of each uv.
+
+        Uvs are linked along the face edges, a uv not assigned to any face
+        is a shell by itself.
+        """
+        if MAP not in self._labels:
+            a, b = self.fv_uv, self.fv_uv[self.fv_next]
+            linked = (a >= 0) & (b >= 0)
+            self._labels[MAP] = get_component_labels(self.num_uvs, a[linked], b[linked])
+        return self._labels[MAP]
+
+    def mesh_shells(self, kind, indices=None):
+        """
+        Return ``kind`` index arrays of the mesh shells touched by indices,
+        all shells if no indices are given.
+        """
+        return select_label_groups(self.mesh_shell_labels(kind), indices)
+
+    def map_shells(self, indices=None):
+        """
+        Return uv index arrays of the uv shells touched by uv indices, all
+        shells if no indices are given.
+        """
+        return select_label_groups(self.map_shell_labels(), indices)
+
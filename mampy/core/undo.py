@@ -0,0 +1,76 @@
+"""
+This module contains the ``mampyUndo`` command, a scripted command making
+edits done through the api undoable.
+
+The module is loaded as a Maya plugin the first time `run_undoable` is
+called. Each call runs as one command and is one step in the undo queue.
+"""
+import os
+
+from maya import cmds
+import maya.api.OpenMaya as api
+
+
+__all__ = ['run_undoable']
+
+
+COMMAND_NAME = 'mampyUndo'
+
+_pending = []
+
+
+def maya_useNewAPI():
+    """
+    Tell Maya the plugin is using the new api.
+    """
+
+
+class UndoCommand(api.MPxCommand):
+    """
+    Command running a pair of redo and undo functions.
+    """
+
+    def __init__(self):
+        super(UndoCommand, self).__init__()
+        # Maya loads the plugin as its own module, pending functions are
+        # always read from the package module.
+        from mampy.core.undo import _pending
+        self._redo, self._undo = _pending.pop()
+
+    @staticmethod
+    def creator():
+        return UndoCommand()
+
+    def doIt(self, args):
+        self.redoIt()
+
+    def redoIt(self):
+        self._redo()
+
+    def undoIt(self):
+        self._undo()
+
+    def isUndoable(self):
+        return True
+
+
+def initializePlugin(plugin):
+    api.MFnPlugin(plugin).registerCommand(COMMAND_NAME, UndoCommand.creator)
+
+
+def uninitializePlugin(plugin):
+    api.MFnPlugin(plugin).deregisterCommand(COMMAND_NAME)
+
+
+def run_undoable(redo, undo):
+    """
+    Call redo and record it together with undo as one undo step.
+    """
+    if not hasattr(cmds, COMMAND_NAME):
+        cmds.loadPlugin(os.path.splitext(__file__)[0] + '.py', quiet=True)
+
+    _pending.append((redo, undo))
+    try:
+        getattr(cmds, COMMAND_NAME)()
+    finally:
+        del _pending[:]
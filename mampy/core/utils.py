@@ -2,6 +2,8 @@
 """
 import itertools
 
+import numpy as np
+
 
 def get_average_vert_normal(normals, *args):
     try:
@@ -33,3 +35,103 @@ class IndicesDict(dict):
 class ObjectDict(IndicesDict):
     def __iter__(self):
         return self.itervalues()
+
+
+class IndexSet(object):
+    """
+    Immutable set of unique indices kept as a sorted integer array.
+
+    Membership is a binary search, slicing returns views and set algebra
+    is done on the arrays.
+    """
+
+    def __init__(self, indices=()):
+        self._array = np.unique(np.asarray(indices, dtype=np.int64))
+        self._array.flags.writeable = False
+
+    @classmethod
+    def from_sorted(cls, array):
+        """
+        Create from an already sorted array of unique indices.
+        """
+        new = cls.__new__(cls)
+        new._array = np.asarray(array, dtype=np.int64)
+        new._array.flags.writeable = False
+        return new
+
+    def __repr__(self):
+        return '{}({})'.format(self.__class__.__name__, self)
+
+    def __str__(self):
+        return str(self.tolist())
+
+    def __len__(self):
+        return len(self._array)
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __contains__(self, index):
+        pos = np.searchsorted(self._array, index)
+        return pos < len(self._array) and self._array[pos] == index
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            # A negative step reverses the array, which is sorted again.
+            if key.step is not None and key.step < 0:
+                return IndexSet(self._array[key])
+            return self.from_sorted(self._array[key])
+        return int(self._array[key])
+
+    def __eq__(self, other):
+        return np.array_equal(self._array, IndexSet._get_array(other))
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self._array.tobytes())
+
+    def __nonzero__(self):
+        return bool(len(self._array))
+
+    __bool__ = __nonzero__
+
+    @staticmethod
+    def _get_array(other):
+        if isinstance(other, IndexSet):
+            return other._array
+        return IndexSet(other)._array
+
+    def __or__(self, other):
+        return self.from_sorted(np.union1d(self._array, self._get_array(other)))
+
+    def __and__(self, other):
+        return self.from_sorted(
+            np.intersect1d(self._array, self._get_array(other), assume_unique=True)
+        )
+
+    def __sub__(self, other):
+        return self.from_sorted(
+            np.setdiff1d(self._array, self._get_array(other), assume_unique=True)
+        )
+
+    def __xor__(self, other):
+        return self.from_sorted(
+            np.setxor1d(self._array, self._get_array(other), assume_unique=True)
+        )
+
+    union = __or__
+    intersection = __and__
+    difference = __sub__
+    symmetric_difference = __xor__
+
+    @property
+    def array(self):
+        """
+        Read only view of the sorted index array.
+        """
+        return self._array
+
+    def tolist(self):
+        return self._array.tolist()
@@ -39,6 +39,7 @@ setup(
         'Qt.py==1.1.0b1',
         'mvp',
         'contextlib2',
+        'numpy',
         # 'profilehooks'
     ],
     classifiers=[
@@ -0,0 +1,132 @@
+"""
+Tests for mampy.core.graph module
+"""
+import numpy as np
+
+from mampy.core.graph import (get_component_labels, get_label_groups, select_label_groups,
+                              get_edge_chains, split_outer_and_inner_verts, gather_rows,
+                              get_hop_distances, get_geodesic_distances, get_shortest_paths)
+
+
+def test_component_labels_of_separate_paths():
+    labels = get_component_labels(6, [0, 1, 4], [1, 2, 3])
+    assert list(labels) == [0, 0, 0, 1, 1, 2]
+
+
+def test_component_labels_of_shuffled_path():
+    order = np.random.RandomState(0).permutation(1000)
+    labels = get_component_labels(1000, order[:-1], order[1:])
+    assert not labels.any()
+
+
+def test_component_labels_without_links():
+    assert list(get_component_labels(3, [], [])) == [0, 1, 2]
+
+
+def test_label_groups():
+    groups = get_label_groups([1, 0, 1, 0])
+    assert [list(g) for g in groups] == [[1, 3], [0, 2]]
+
+
+def test_select_label_groups_ignores_negative_labels():
+    groups = select_label_groups([0, -1, 1, 0, 1], selected=[3])
+    assert [list(g) for g in groups] == [[0, 3]]
+
+
+def test_edge_chains_orders_open_chain():
+    (verts, edges), = get_edge_chains([(2, 3), (0, 1), (2, 1)])
+    assert list(verts) in ([0, 1, 2, 3], [3, 2, 1, 0])
+    assert len(edges) == 3
+
+
+def test_edge_chains_of_open_and_closed_chains():
+    chains = get_edge_chains([(0, 1), (1, 2), (2, 0), (5, 6)], [10, 11, 12, 13])
+    closed, open_ = sorted(chains, key=lambda chain: len(chain[1]), reverse=True)
+    assert sorted(closed[0]) == [0, 1, 2] and sorted(closed[1]) == [10, 11, 12]
+    assert list(open_[1]) == [13]
+
+
+def test_edge_chains_of_loop_through_junction():
+    chains = get_edge_chains([(0, 1), (1, 2), (2, 0), (0, 3)])
+    closed, open_ = sorted(chains, key=lambda chain: len(chain[1]), reverse=True)
+    assert list(closed[0]) == [0, 1, 2] and len(closed[1]) == 3
+    assert list(open_[0]) == [0, 3] and list(open_[1]) == [3]
+
+
+def test_split_outer_and_inner_verts_per_chain():
+    loops = split_outer_and_inner_verts([(0, 1), (1, 2), (2, 3), (10, 11), (11, 10), (7, 8)])
+    assert [(list(outer), list(inner)) for outer, inner in loops] == [
+        ([0, 3], [1, 2]), ([7, 8], []), ([], [10, 11]),
+    ]
+
+
+def get_path_graph(count):
+    # Nodes in a line, links stored both ways.
+    neighbours = [[i - 1, i + 1] if 0 < i < count - 1 else [1] if i == 0 else [count - 2]
+                  for i in range(count)]
+    offsets = np.cumsum([0] + [len(n) for n in neighbours])
+    return offsets, np.array(sum(neighbours, []))
+
+
+def test_gather_rows():
+    offsets, values = np.array([0, 2, 2, 5]), np.array([10, 11, 12, 13, 14])
+    gathered, rows = gather_rows(offsets, values, [2, 1, 0], return_rows=True)
+    assert list(gathered) == [12, 13, 14, 10, 11]
+    assert list(rows) == [0, 0, 0, 2, 2]
+    assert list(gather_rows(offsets, None, [0, 2], ends=np.array([1, 2, 4]))) == [0, 2, 3]
+
+
+def test_hop_distances_with_max_distance():
+    offsets, neighbours = get_path_graph(6)
+    distances = get_hop_distances(offsets, neighbours, [2], max_distance=2)
+    assert list(distances) == [2, 1, 0, 1, 2, np.inf]
+
+
+def test_geodesic_distances_from_several_seeds():
+    offsets, neighbours = get_path_graph(5)
+    weights = np.full(len(neighbours), 0.5)
+    distances = get_geodesic_distances(offsets, neighbours, weights, [0, 4], max_distance=0.6)
+    assert list(distances) == [0, 0.5, np.inf, 0.5, 0]
+
+
+def test_shortest_paths_on_grid():
+    # 3x3 grid, horizontal links are cheaper than vertical ones.
+    links = {}
+    for node in range(9):
+        row, col = divmod(node, 3)
+        links[node] = [(node + d, w) for d, w, ok in [(-3, 2, row > 0), (3, 2, row < 2),
+                                                         (-1, 1, col > 0), (1, 1, col < 2)] if ok]
+    offsets = np.cumsum([0] + [len(links[n]) for n in range(9)])
+    neighbours = np.array([n for node in range(9) for n, _ in links[node]])
+    weights = np.array([w for node in range(9) for _, w in links[node]], dtype=float)
+
+    def get_estimate(target):
+        row, col = divmod(target, 3)
+        return lambda node: abs(node // 3 - row) * 2 + abs(node % 3 - col)
+
+    paths = get_shortest_paths(offsets, neighbours, weights, [0, 0, 4], [8, 2, 4],
+                               get_estimate)
+    assert weights[paths[0]].sum() == 6 and neighbours[paths[0]][-1] == 8
+    assert list(neighbours[paths[1]]) == [1, 2]
+    assert paths[2] == []
+
+
+def test_shortest_paths_to_unreachable_node():
+    offsets, neighbours = get_path_graph(3)
+    offsets = np.append(offsets, offsets[-1])
+    assert get_shortest_paths(offsets, neighbours, np.ones(len(neighbours)), [0], [3]) == [None]
+
+
+def test_shortest_paths_on_graph_given_as_lists():
+    offsets, neighbours = get_path_graph(5)
+    weights = np.ones(len(neighbours))
+    expected = get_shortest_paths(offsets, neighbours, weights, [0, 4], [3, 1])
+    assert get_shortest_paths(offsets.tolist(), neighbours.tolist(), weights.tolist(),
+                              [0, 4], [3, 1]) == expected
+
+
+def test_geodesic_distances_on_graph_given_as_lists():
+    offsets, neighbours = get_path_graph(5)
+    distances = get_geodesic_distances(offsets.tolist(), neighbours.tolist(), [0.5] * 8, [0],
+                                       max_distance=1.0)
+    assert list(distances) == [0, 0.5, 1.0, np.inf, np.inf]
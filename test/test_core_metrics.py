@@ -0,0 +1,68 @@
+"""
+Tests for mampy.core.metrics module
+"""
+import numpy as np
+
+from mampy.core.topology import MeshTopology
+from mampy.core.metrics import (get_mesh_edge_lengths, get_mesh_face_areas,
+                                get_mesh_face_centroids, get_mesh_uv_areas,
+                                get_texel_densities)
+
+
+def get_grid(size, face_uvs=None):
+    """
+    Return ``(topology, points)`` of a grid of size by size unit quads in
+    the xz plane, vertex ``(row, col)`` is ``row * (size + 1) + col``.
+    """
+    faces, edges = [], []
+    for row in range(size + 1):
+        for col in range(size + 1):
+            vert = row * (size + 1) + col
+            if col < size:
+                edges.append((vert, vert + 1))
+            if row < size:
+                edges.append((vert, vert + size + 1))
+            if row < size and col < size:
+                faces.extend([vert, vert + 1, vert + size + 2, vert + size + 1])
+    num_verts = (size + 1) ** 2
+    points = np.array([[col, 0, row] for row in range(size + 1) for col in range(size + 1)],
+                      dtype=np.float64)
+    num_uvs = 0 if face_uvs is None else num_verts
+    topology = MeshTopology([4] * size ** 2, faces, edges, num_verts, face_uvs, num_uvs)
+    return topology, points
+
+
+def test_edge_lengths():
+    topology, points = get_grid(2)
+    assert np.allclose(get_mesh_edge_lengths(topology, points), 1.0)
+    assert np.allclose(get_mesh_edge_lengths(topology, points * 2), 2.0)
+
+
+def test_face_areas():
+    topology, points = get_grid(2)
+    assert np.allclose(get_mesh_face_areas(topology, points), 1.0)
+    points[:, 0] *= 3
+    assert np.allclose(get_mesh_face_areas(topology, points), 3.0)
+
+
+def test_face_centroids():
+    topology, points = get_grid(2)
+    expected = [[0.5, 0, 0.5], [1.5, 0, 0.5], [0.5, 0, 1.5], [1.5, 0, 1.5]]
+    assert np.allclose(get_mesh_face_centroids(topology, points), expected)
+
+
+def test_uv_areas():
+    topology, points = get_grid(2)
+    assert list(get_mesh_uv_areas(topology, np.zeros((0, 2)))) == [0, 0, 0, 0]
+
+    # One uv per vertex except on the first face, uvs span half the grid.
+    face_uvs = topology.fv_vert.copy()
+    face_uvs[:4] = -1
+    topology, points = get_grid(2, face_uvs)
+    uvs = points[:, [0, 2]] * 0.5
+    assert np.allclose(get_mesh_uv_areas(topology, uvs), [0, 0.25, 0.25, 0.25])
+
+
+def test_texel_densities():
+    areas, uv_areas = np.array([1.0, 4.0, 0.0, 1.0]), np.array([0.25, 0.25, 0.25, 0.0])
+    assert np.allclose(get_texel_densities(areas, uv_areas, 1024), [512, 256, 0, 0])
@@ -0,0 +1,39 @@
+"""
+Tests for mampy.core.spatial module
+"""
+import numpy as np
+
+from mampy.core.spatial import KDTree, get_mirror_indices
+
+
+def get_distances(queries, points):
+    return np.sqrt(((queries[:, np.newaxis] - points[np.newaxis]) ** 2).sum(axis=-1))
+
+
+def test_query_matches_brute_force():
+    random = np.random.RandomState(0)
+    points, queries = random.rand(500, 3), random.rand(50, 3)
+    distances, indices = KDTree(points, leaf_size=4).query(queries, k=3)
+    expected = np.sort(get_distances(queries, points), axis=1)[:, :3]
+    assert np.allclose(distances, expected)
+    assert np.allclose(get_distances(queries, points)[np.arange(50)[:, None], indices], expected)
+
+
+def test_query_with_fewer_points_than_k():
+    distances, indices = KDTree([(0, 0), (1, 0)]).query([(0, 0)], k=3)
+    assert list(indices[0]) == [0, 1, -1] and np.isinf(distances[0, 2])
+
+
+def test_query_radius_matches_brute_force():
+    random = np.random.RandomState(1)
+    points, queries = random.rand(300, 2), random.rand(20, 2)
+    result = KDTree(points, leaf_size=8).query_radius(queries, 0.2)
+    distances = get_distances(queries, points)
+    for found, row in zip(result, distances):
+        assert sorted(found) == list(np.flatnonzero(row <= 0.2))
+
+
+def test_mirror_indices_within_tolerance():
+    points = [(1, 0, 0), (0, 1, 0), (-1, 0, 0), (-2, 0, 0), (2.01, 0, 0)]
+    assert list(get_mirror_indices(points, axis=0, tolerance=0.001)) == [2, 1, 0, -1, -1]
+    assert list(get_mirror_indices(points, axis=0, tolerance=0.1)) == [2, 1, 0, 4, 3]
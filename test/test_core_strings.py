@@ -0,0 +1,32 @@
+"""
+Tests for mampy.core.strings module
+"""
+import numpy as np
+
+from mampy.core.strings import (get_range_indices, parse_component_strings, get_component_strings,
+                                iter_component_strings)
+
+
+def test_range_indices():
+    assert list(get_range_indices([0, 5, 9], [2, 5, 8])) == [0, 1, 2, 5]
+
+
+def test_parse_component_strings_groups_per_mesh_and_type():
+    components, rest = parse_component_strings([
+        'pCube1.vtx[3:5]', '|grp|ns:pCube2.f[1]', 'pCube1.vtx[4]', 'pCube1.vtx[0]',
+        'pCube1', 'pCube1.vtxFace[1][2]',
+    ])
+    assert list(components) == [('pCube1', 'vtx'), ('|grp|ns:pCube2', 'f')]
+    assert list(components['pCube1', 'vtx']) == [0, 3, 4, 5]
+    assert rest == ['pCube1', 'pCube1.vtxFace[1][2]']
+
+
+def test_component_strings_are_range_compressed():
+    strings = get_component_strings('pCube1', 'vtx', [12, 10, 11, 5, 30, 31])
+    assert strings == ['pCube1.vtx[5]', 'pCube1.vtx[10:12]', 'pCube1.vtx[30:31]']
+
+
+def test_streamed_component_strings_join_runs_between_chunks():
+    chunks = [np.array([1, 2, 3]), np.array([4, 5, 9]), np.array([], dtype=int), np.array([10, 12])]
+    strings = list(iter_component_strings('pCube1', 'e', chunks))
+    assert strings == ['pCube1.e[1:5]', 'pCube1.e[9:10]', 'pCube1.e[12]']
@@ -0,0 +1,122 @@
+"""
+Tests for mampy.core.topology module
+"""
+import numpy as np
+
+from mampy.core.topology import MeshTopology, VERT, EDGE, FACE, MAP
+
+
+def get_topology(counts, faces, num_verts):
+    """
+    Return topology of faces with one uv per vertex, edges numbered in the
+    order they are first met.
+    """
+    edges = {}
+    start = 0
+    for count in counts:
+        face = faces[start:start + count]
+        start += count
+        for a, b in zip(face, face[1:] + face[:1]):
+            edges.setdefault((min(a, b), max(a, b)), len(edges))
+    edge_verts = sorted(edges, key=edges.get)
+    return MeshTopology(counts, faces, edge_verts, num_verts, faces, num_verts)
+
+
+def get_grid(size):
+    """
+    Return topology of a grid of size by size quads, vertex ``(row, col)``
+    is ``row * (size + 1) + col``.
+    """
+    faces = []
+    for row in range(size):
+        for col in range(size):
+            vert = row * (size + 1) + col
+            faces.extend([vert, vert + 1, vert + size + 2, vert + size + 1])
+    return get_topology([4] * size ** 2, faces, (size + 1) ** 2)
+
+
+def get_edges(topology, *pairs):
+    a, b = np.array(pairs).T
+    return np.sort(topology.find_edges(a, b))
+
+
+def test_face_to_edge_internal_and_border():
+    grid = get_grid(3)
+    internal = grid.convert([0], FACE, EDGE, internal=True)
+    border = grid.convert([0], FACE, EDGE, border=True)
+    assert list(internal) == list(get_edges(grid, (0, 1), (0, 4)))
+    assert list(border) == list(get_edges(grid, (1, 5), (4, 5)))
+    assert len(grid.convert([0], FACE, EDGE)) == 4
+
+
+def test_vert_to_face_internal():
+    grid = get_grid(3)
+    assert list(grid.convert([0, 1, 4, 5, 6], VERT, FACE, internal=True)) == [0]
+    assert list(grid.convert([0, 1, 4, 5, 6], VERT, FACE)) == [0, 1, 2, 3, 4, 5]
+
+
+def test_map_to_edge_and_back():
+    grid = get_grid(3)
+    assert list(grid.convert([0, 1], MAP, EDGE, internal=True)) == list(get_edges(grid, (0, 1)))
+    assert list(grid.convert([0, 1], MAP, EDGE)) == list(get_edges(grid, (0, 1), (1, 2),
+                                                                   (0, 4), (1, 5)))
+    assert list(grid.convert(get_edges(grid, (5, 6)), EDGE, MAP)) == [5, 6]
+
+
+def test_border_mask():
+    grid = get_grid(3)
+    assert list(np.flatnonzero(~grid.border_mask(VERT))) == [5, 6, 9, 10]
+    assert list(np.flatnonzero(~grid.border_mask(FACE))) == [4]
+    assert grid.border_mask(EDGE).sum() == 12
+    assert not grid.border_mask(EDGE)[get_edges(grid, (5, 6), (1, 5))].any()
+
+
+def test_loops_stop_at_mesh_corners():
+    grid = get_grid(3)
+    loops = grid.edge_loops(get_edges(grid, (0, 1), (5, 6)))
+    assert len(loops) == 2
+    assert list(loops[0]) == list(get_edges(grid, (0, 1), (1, 2), (2, 3)))
+    assert list(loops[1]) == list(get_edges(grid, (4, 5), (5, 6), (6, 7)))
+
+
+def test_rings_stop_at_non_quads():
+    # Two quads in a row closed off by a triangle.
+    mesh = get_topology([4, 4, 3], [0, 1, 4, 3, 1, 2, 5, 4, 2, 6, 5], 7)
+    rings = mesh.edge_rings(get_edges(mesh, (0, 3)))
+    assert len(rings) == 1
+    assert list(rings[0]) == list(get_edges(mesh, (0, 3), (1, 4), (2, 5)))
+
+
+def test_border_loops_close():
+    grid = get_grid(3)
+    loops = grid.border_loops()
+    assert len(loops) == 1
+    assert list(loops[0]) == list(np.flatnonzero(grid.border_mask(EDGE)))
+    counts = np.bincount(grid.edge_verts[loops[0]].ravel())
+    assert set(counts[counts > 0]) == {2}
+
+
+def test_seeds_on_one_loop_return_it_once():
+    grid = get_grid(3)
+    loops = grid.edge_loops(get_edges(grid, (0, 1), (1, 2), (2, 3)))
+    assert len(loops) == 1
+    assert len(loops[0]) == 3
+
+
+def test_grow_centre_vertex_to_block():
+    grid = get_grid(4)
+    assert list(grid.grow(VERT, [12])) == [6, 7, 8, 11, 12, 13, 16, 17, 18]
+
+
+def test_shrink_keeps_mesh_border():
+    grid = get_grid(4)
+    assert list(grid.shrink(VERT, range(25))) == list(range(25))
+    patch = [0, 1, 2, 5, 6, 7, 10, 11, 12]
+    assert list(grid.shrink(VERT, patch)) == [0, 1, 5, 6]
+
+
+def test_inner_and_outer_border_ring():
+    grid = get_grid(4)
+    patch = [0, 1, 2, 4, 5, 6, 8, 9, 10]
+    assert list(grid.border_ring(FACE, patch)) == [2, 6, 8, 9, 10]
+    assert list(grid.border_ring(FACE, patch, outer=True)) == [3, 7, 11, 12, 13, 14, 15]
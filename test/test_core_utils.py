@@ -0,0 +1,44 @@
+"""
+Tests for mampy.core.utils module
+"""
+from mampy.core.utils import IndexSet
+
+
+def test_index_set_is_sorted_and_unique():
+    indices = IndexSet([5, 1, 3, 1])
+    assert list(indices) == [1, 3, 5]
+    assert len(indices) == 3
+
+
+def test_index_set_contains():
+    indices = IndexSet([2, 8, 4])
+    assert 4 in indices
+    assert 5 not in indices
+    assert 9 not in indices
+
+
+def test_index_set_slice_returns_index_set():
+    indices = IndexSet(range(10))[2:5]
+    assert isinstance(indices, IndexSet)
+    assert list(indices) == [2, 3, 4]
+
+
+def test_index_set_reversed_slice_stays_sorted():
+    indices = IndexSet(range(10))[::-2]
+    assert list(indices) == [1, 3, 5, 7, 9]
+    assert 3 in indices
+    assert 2 not in indices
+    assert 2 in IndexSet(range(10))[::-1]
+
+
+def test_index_set_algebra():
+    a, b = IndexSet([1, 2, 3]), IndexSet([3, 4])
+    assert list(a | b) == [1, 2, 3, 4]
+    assert list(a & b) == [3]
+    assert list(a - b) == [1, 2]
+    assert list(a ^ b) == [1, 2, 4]
+
+
+def test_index_set_compares_with_sequences():
+    assert IndexSet([3, 1]) == [1, 3]
+    assert not IndexSet()